@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+# file: batch.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: batch computations driven by job files
+# repository: https://github.com/RochSchanen/pygnetti
+
+# A job file (JSON) lists the jobs: each job defines a coil (the
+# keywords of "set_geometry()"), a grid (the arguments of
+# "set_grid()") and the output files, the type of which is given by
+# the extension:
+#
+# ".txt"    columns x, z, BX, BZ (see "ielib.py")
+# ".npz"    arrays X, Z, BX and BZ (numpy format)
+# ".eps"    wires and field vectors (".ps", ".pdf" as well)
+# ".png"    image of the map "map" ("B", "BX", "BZ" or "ppm", see
+#           "raster.py") with the colour map "cmap"
+#
+# {
+#     "table": "./J1J2.txt",
+#     "jobs": [
+#         {"name": "main",
+#          "coil": {"radius": 15, "height": 10.0, "turns": 10, "layers": 6},
+#          "grid": [0.0, 14.0, 57, -20.0, 20.0, 161],
+#          "outputs": ["main.txt", "main.eps", "main.png"],
+#          "map": "ppm", "size": "A4"},
+#         ...
+#     ]
+# }
+#
+# All the jobs run in one process (the tables are loaded once), or
+# are spread over worker processes. The jobs of the same coil and
+# grid share the computed field: they are run together, the field
+# being computed by the first job only. The time spent on each job
+# is reported.
+
+# from "https://numpy.org/"
+from numpy import savez
+from numpy import hypot
+from numpy import nanmax
+
+# from the standard library
+from os import cpu_count
+from os.path import splitext
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+
+# from local modules
+from pygnetti import coil
+from ielib import file_import, file_export
+
+# the jobs of the demonstration
+EXAMPLE = {
+    "table": "./J1J2.txt",
+    "jobs": [
+        {"name": "short", "coil": {"radius": 15, "height": 5.0,
+            "turns": 5, "layers": 10}, "grid": [0.0, 14.0, 57, -20.0, 20.0, 161],
+            "outputs": ["short.txt", "short.eps"]},
+        {"name": "short-ppm", "coil": {"radius": 15, "height": 5.0,
+            "turns": 5, "layers": 10}, "grid": [0.0, 14.0, 57, -20.0, 20.0, 161],
+            "outputs": ["short.png"], "map": "ppm", "cmap": "coolwarm"},
+        {"name": "long", "coil": {"radius": 15, "height": 40.0,
+            "turns": 40, "layers": 4}, "grid": [0.0, 14.0, 57, -30.0, 30.0, 241],
+            "outputs": ["long.npz", "long.png"]},
+    ],
+}
+
+################################################## OUTPUTS
+
+# write the field of the coil "c" (grid computed) to "path"
+def output(c, path, job):
+    base, ext = splitext(path)
+    if ext == ".txt":
+        file_export(path, c.X.reshape(-1), c.Z.reshape(-1),
+            c.BX.reshape(-1), c.BZ.reshape(-1),
+            cm = [f"{job['name']}: {json.dumps(job['coil'])}",
+                  "x [mm], z [mm], BX [mT], BZ [mT]"])
+    elif ext == ".npz":
+        savez(path, X = c.X, Z = c.Z, BX = c.BX, BZ = c.BZ)
+    elif ext in (".eps", ".ps", ".pdf"):
+        if ext == ".pdf": from pdflib import document
+        else: from pslib import document
+        with document(Path = base, Size = job.get("size", "A4"),
+                Type = ext[1:]) as d:
+            d.rgbcolor(0.8, 0.1, 0.3)
+            d.thickness(0.01)
+            c.draw_wires(d)
+            # the longest vector is 1.5mm (the mean vector
+            # of the cells of 1mm is drawn)
+            s = 1.5/nanmax(hypot(c.BX, c.BZ))
+            d.define_arrow_style(0.4)
+            d.rgbcolor(0.1, 0.3, 0.9)
+            d.thickness(0.1)
+            d.arrows(c.X, c.Z, c.BX*s, c.BZ*s,
+                Cull = True, Cell = 1.0, Mean = True)
+    elif ext == ".png":
+        from raster import fieldimage, writepng
+        writepng(path, fieldimage(c, job.get("map", "B"),
+            cmap = job.get("cmap", "viridis")))
+    else:
+        raise ValueError(f"unknown output type '{ext}'")
+    return
+
+################################################## JOBS
+
+# the tables of the process (loaded once)
+_table = None
+
+def _init(table):
+    global _table
+    _table = file_import(table, 2)
+    return
+
+# run a group of jobs of the same coil and grid: returns the
+# times [(name, field, outputs), ...] (field is None when the
+# field was computed by a previous job of the group)
+def _group(jobs):
+    c, T = coil(_table), []
+    for k, job in enumerate(jobs):
+        t = perf_counter()
+        if k == 0:
+            c.set_geometry(**job["coil"])
+            c.set_grid(*job["grid"])
+            c.computeCoil()
+        f = perf_counter()-t if k == 0 else None
+        t = perf_counter()
+        for path in job["outputs"]:
+            output(c, path, job)
+        T.append((job["name"], f, perf_counter()-t))
+    return T
+
+# run the jobs of the job file "path" (or of the dictionary) with
+# "workers" processes (0: in the calling process). Returns the times
+# [(name, field, outputs), ...] in the order of completion.
+def run(path, workers = 0, verbose = True):
+    if isinstance(path, str):
+        with open(path) as f: J = json.load(f)
+    else: J = path
+    # group the jobs of the same coil and grid (in order)
+    G = {}
+    for job in J["jobs"]:
+        key = json.dumps([job["coil"], job["grid"]], sort_keys = True)
+        G.setdefault(key, []).append(job)
+    # report the times of the jobs of one group
+    def report(T):
+        if verbose:
+            for name, f, o in T:
+                print(f"{name:>16}: field "
+                    f"{'cached' if f is None else f'{f:.3f}s':>8}, "
+                    f"outputs {o:.3f}s")
+        return T
+    R = []
+    table = J.get("table", "./J1J2.txt")
+    if workers == 0:
+        _init(table)
+        for jobs in G.values():
+            R += report(_group(jobs))
+    else:
+        with ProcessPoolExecutor(workers or cpu_count(),
+                initializer = _init, initargs = (table,)) as X:
+            F = [X.submit(_group, jobs) for jobs in G.values()]
+            for f in as_completed(F):
+                R += report(f.result())
+    return R
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description = "run the jobs of a job file")
+    parser.add_argument("jobs", nargs = "?", default = None,
+        help = "job file (JSON, the demonstration jobs by default)")
+    parser.add_argument("--workers", type = int, default = 0,
+        help = "number of worker processes (0: none, -1: all cores)")
+    args = parser.parse_args()
+
+    t = perf_counter()
+    R = run(args.jobs or EXAMPLE,
+        None if args.workers < 0 else args.workers)
+    print(f"{len(R)} jobs: {perf_counter()-t:.3f}s")
@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+# file: contours.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: contour lines of the field maps
+# repository: https://github.com/RochSchanen/pygnetti
+
+# The contour lines (iso-field, homogeneity) are extracted from the
+# grids of "pygnetti.py" (X, Z, and a map computed from BX and BZ)
+# by the marching squares algorithm. All the levels and all the
+# cells are processed together: a cell produces one oriented
+# segment (two at a saddle point) between the crossing points of
+# its edges, the higher values being on the left of the segment.
+# Each crossing point then has at most one successor and one
+# predecessor, and the segments are joined into polylines by
+# pointer jumping (the number of passes grows as the logarithm of
+# the number of points).
+
+# from "https://numpy.org/"
+from numpy import hypot
+from numpy import asarray
+from numpy import arange
+from numpy import full
+from numpy import array
+from numpy import stack
+from numpy import where
+from numpy import nonzero
+from numpy import minimum
+from numpy import isfinite
+from numpy import unique
+from numpy import searchsorted
+from numpy import concatenate
+from numpy import lexsort
+from numpy import uint8
+
+################################################## MAPS
+
+# field magnitude [mT]
+def magnitude(BX, BZ):
+    return hypot(BX, BZ)
+
+# homogeneity [ppm]: relative deviation of the map F from the
+# reference value F0 (the central field for example)
+def homogeneity(F, F0):
+    return 1E6*(F-F0)/F0
+
+################################################## CONTOURS
+
+# order the nodes of the linked lists "nxt" (the successor of a
+# node, or -1): returns the first node of the list of each node,
+# the rank of each node in its list, and the closed lists flags.
+# The closed lists are opened at their smallest node.
+def _chains(nxt):
+    N = len(nxt)
+    K = arange(N)
+    passes = int(N).bit_length()+1
+    # predecessors
+    prv = full(N, -1)
+    m = nxt >= 0
+    prv[nxt[m]] = K[m]
+    # smallest node of the closed lists
+    P, M = where(prv < 0, K, prv), K.copy()
+    for p in range(passes):
+        M, P = minimum(M, M[P]), P[P]
+    closed = prv[P] >= 0
+    prv[closed & (M == K)] = -1
+    # first nodes and ranks
+    P = where(prv < 0, K, prv)
+    R = (prv >= 0).astype(int)
+    for p in range(passes):
+        R, P = R+R[P], P[P]
+    return P, R, closed
+
+# marching squares cases: the corners of a cell (counter clockwise
+# from the bottom left) above the level are the bits of the case
+# index. The contour leaves the cell through the edge that goes
+# down (from a corner above to a corner below, counter clockwise,
+# the edges being bottom, right, top, left) and enters it through
+# the edge that goes up. The saddle cases (5 and 10) have two down
+# edges, the other cases have one (or none).
+_DOWN = [[k for k in range(4) if q>>k&1 and not q>>(k+1)%4&1] for q in range(16)]
+_UP = [[k for k in range(4) if not q>>k&1 and q>>(k+1)%4&1] for q in range(16)]
+DOWN = array([(d+[-1])[0] for d in _DOWN])
+UP = array([(u+[-1])[0] for u in _UP])
+
+# contour lines of the map F at the grid points (X, Z) (as built
+# by "meshgrid()") for all the "levels". Returns a list of lists
+# of polylines (x, z), one list per level. The closed contours
+# end with their first point. The cells with undefined values
+# (on the wires for example) are skipped.
+def contours(X, Z, F, levels):
+    X = asarray(X, dtype = float)
+    Z = asarray(Z, dtype = float)
+    F = asarray(F, dtype = float)
+    V = asarray(levels, dtype = float).reshape(-1)
+    ny, nx = F.shape
+    # case index of the cells, for all levels
+    H = (F > V[:, None, None]).astype(uint8)
+    Q = H[:, :-1, :-1] | H[:, :-1, 1:]<<1 | H[:, 1:, 1:]<<2 | H[:, 1:, :-1]<<3
+    ok = isfinite(F[:-1, :-1]+F[:-1, 1:]+F[1:, 1:]+F[1:, :-1])
+    l, i, j = nonzero((Q != 0) & (Q != 15) & ok)
+    # no level crosses the map
+    if len(l) == 0: return [[] for v in V]
+    q = Q[l, i, j]
+    # edges of the cells (bottom, right, top, left) numbered
+    # horizontal first, then vertical, level after level
+    NH, NE = ny*(nx-1), ny*(nx-1)+(ny-1)*nx
+    E = stack((
+        i*(nx-1)+j,
+        NH+i*nx+j+1,
+        (i+1)*(nx-1)+j,
+        NH+i*nx+j), -1)+(l*NE)[:, None]
+    # one segment per cell
+    m = (q != 5) & (q != 10)
+    k = nonzero(m)[0]
+    S, T = [E[k, DOWN[q[k]]]], [E[k, UP[q[k]]]]
+    # two segments at the saddle points: the centre value
+    # decides which corners are connected
+    k = nonzero(~m)[0]
+    G = F[i[k], j[k]]+F[i[k], j[k]+1]+F[i[k]+1, j[k]+1]+F[i[k]+1, j[k]]
+    G = G/4 > V[l[k]]
+    for d in (0, 2):
+        e = DOWN[q[k]]+d
+        S.append(E[k, e])
+        T.append(E[k, where(G, e+1, e+3)%4])
+    S, T = concatenate(S), concatenate(T)
+    # link the crossing points and join the segments
+    nodes = unique(concatenate((S, T)))
+    nxt = full(len(nodes), -1)
+    nxt[searchsorted(nodes, S)] = searchsorted(nodes, T)
+    P, R, closed = _chains(nxt)
+    # crossing points: linear interpolation along the edges
+    l, e = nodes//NE, nodes%NE
+    h = e < NH
+    i0, j0 = where(h, e//(nx-1), (e-NH)//nx), where(h, e%(nx-1), (e-NH)%nx)
+    i1, j1 = i0+~h, j0+h
+    t = (V[l]-F[i0, j0])/(F[i1, j1]-F[i0, j0])
+    PX = X[i0, j0]+t*(X[i1, j1]-X[i0, j0])
+    PZ = Z[i0, j0]+t*(Z[i1, j1]-Z[i0, j0])
+    # polylines
+    o = lexsort((R, P))
+    b = concatenate(([0], nonzero(P[o][1:] != P[o][:-1])[0]+1, [len(o)]))
+    Lines = [[] for v in V]
+    for p, r in zip(b[:-1], b[1:]):
+        k = o[p:r]
+        if closed[k[0]]:
+            k = concatenate((k, k[:1]))
+        Lines[l[k[0]]].append((PX[k], PZ[k]))
+    return Lines
+
+if __name__ == "__main__":
+
+    from pslib import document
+    from pygnetti import coil
+
+    # coil of the "pygnetti.py" demonstration
+    c = coil()
+    c.set_geometry(radius = 15, height = 5.0, turns = 5, layers = 10)
+    c.set_grid(-40.0, 40.0, 401, -40.0, 40.0, 401)
+    c.computeCoil()
+
+    # homogeneity of the field magnitude (the grid
+    # centre is the origin)
+    B = magnitude(c.BX, c.BZ)
+    F = homogeneity(B, B[200, 200])
+    levels = [-1E5, -1E4, -1E3, -1E2, +1E2, +1E3, +1E4, +1E5]
+    Lines = contours(c.X, c.Z, F, levels)
+
+    with document(Path = "contours", Size = "A5", Type = "eps") as d:
+        d.rgbcolor(0.8, 0.1, 0.3)
+        d.thickness(0.01)
+        c.draw_wires(d)
+        d.thickness(0.1)
+        for v, L in zip(levels, Lines):
+            d.rgbcolor(*((0.1, 0.3, 0.9) if v < 0 else (0.9, 0.3, 0.1)))
+            d.path(L)
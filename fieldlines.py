@@ -0,0 +1,204 @@
+#!/usr/bin/python3
+# file: fieldlines.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: field lines tracer
+# repository: https://github.com/RochSchanen/pygnetti
+
+# The field lines are the solutions of dr/ds = B/|B| in the plane
+# xOz, where s is the length along the line. They are integrated
+# from seed points with the adaptive Runge-Kutta scheme of Dormand
+# and Prince (RK5(4), with first same as last). All the lines are
+# integrated together with their own step sizes: each stage is a
+# single call to the field evaluation over the positions of the
+# active lines. The loops are computed with the fast kernel of
+# "pygnetti.py" ("coil.field()").
+
+# from "https://numpy.org/"
+from numpy import hypot
+from numpy import asarray
+from numpy import arange
+from numpy import full
+from numpy import ones
+from numpy import zeros
+from numpy import minimum
+from numpy import maximum
+from numpy import isfinite
+from numpy import concatenate
+from numpy import argsort
+
+################################################## DORMAND-PRINCE
+
+# coefficients of the stages (the last stage is evaluated at the
+# new position and becomes the first stage of the next step)
+_a = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    [35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84]]
+
+# weights of the 5th order solution (the last row above) minus
+# the weights of the embedded 4th order solution: error estimate
+_e = [
+    35/384-5179/57600,
+    0.0,
+    500/1113-7571/16695,
+    125/192-393/640,
+    -2187/6784+92097/339200,
+    11/84-187/2100,
+    -1/40]
+
+################################################## TRACER
+
+# unit vectors of the field (times the direction S = +1 or -1)
+# at the points (X, Z). They are not finite at the null points
+# of the field and on the wires (which terminates the lines).
+def direction(c, X, Z, S):
+    BX, BZ = c.field(X, Z)
+    B = S/hypot(BX, BZ)
+    return BX*B, BZ*B
+
+# trace the field lines of the coil "c" from the seed points (X0,
+# Z0) [mm]. The lines are traced in both directions ("both"), or
+# along the field only. A line stops when its length reaches
+# "length", after "nmax" steps, when it leaves the "box" (xmin,
+# xmax, zmin, zmax), when the field is not defined, or when it
+# returns to its seed (the line is then closed). "tol" is the
+# maximum position error per step [mm], the step sizes remain
+# between "hmin" and "hmax". Returns the list of polylines (X, Z)
+# and the list of closed lines flags.
+def tracelines(c, X0, Z0,
+        length = 100.0, # maximum length of a line [mm]
+        tol    = 1E-4,  # error per step [mm]
+        h      = 0.1,   # initial step [mm]
+        hmin   = 1E-6,  # minimum step [mm]
+        hmax   = 1.0,   # maximum step [mm]
+        nmax   = 100000,# maximum number of steps
+        box    = None,  # bounding box [mm]
+        both   = True): # trace backward as well
+    X0 = asarray(X0, dtype = float).reshape(-1)
+    Z0 = asarray(Z0, dtype = float).reshape(-1)
+    n = len(X0)
+    # line index, direction, seed
+    S = concatenate((ones(n), -ones(n))) if both else ones(n)
+    K = arange(len(S))
+    XS, ZS = concatenate((X0, X0))[K], concatenate((Z0, Z0))[K]
+    # state of the active lines
+    X, Z = XS.copy(), ZS.copy()
+    H = full(len(K), float(h))
+    L = zeros(len(K))
+    left = zeros(len(K), dtype = bool)
+    closed = zeros(len(K), dtype = bool)
+    # first stage
+    FX, FZ = direction(c, X, Z, S)
+    # recorded points (line index, x, z)
+    R = [(K, X.copy(), Z.copy())]
+    # the active lines are at the index "i"
+    i = arange(len(K))
+    for step in range(nmax):
+        # remove the lines that can not go further
+        ok = isfinite(FX[i]) & isfinite(FZ[i]) & (L[i] < length)
+        if box is not None:
+            xmin, xmax, zmin, zmax = box
+            ok &= (X[i] >= xmin) & (X[i] <= xmax)
+            ok &= (Z[i] >= zmin) & (Z[i] <= zmax)
+        i = i[ok]
+        if len(i) == 0: break
+        # do not go beyond the maximum length
+        h = minimum(H[i], length-L[i])
+        x, z, s = X[i], Z[i], S[i]
+        # stages
+        KX, KZ = [FX[i]], [FZ[i]]
+        for a in _a[1:]:
+            dx, dz = 0.0, 0.0
+            for aj, kx, kz in zip(a, KX, KZ):
+                dx, dz = dx+aj*kx, dz+aj*kz
+            kx, kz = direction(c, x+h*dx, z+h*dz, s)
+            KX.append(kx)
+            KZ.append(kz)
+        # new positions (dx, dz hold the 5th order solution)
+        xn, zn = x+h*dx, z+h*dz
+        ex, ez = 0.0, 0.0
+        for ej, kx, kz in zip(_e, KX, KZ):
+            ex, ez = ex+ej*kx, ez+ej*kz
+        e = h*hypot(ex, ez)
+        # accept the steps within tolerance (or at the
+        # minimum step size) when the field is defined
+        a = ((e <= tol) | (h <= hmin)) & isfinite(e)
+        # the field is not defined (a wire is crossed):
+        # the step is reduced until it becomes minimal
+        u = ~isfinite(e) & (h <= hmin)
+        j = i[a]
+        X[j], Z[j], L[j] = xn[a], zn[a], L[j]+h[a]
+        FX[j], FZ[j] = KX[-1][a], KZ[-1][a]
+        FX[i[u]] = float("nan")
+        # closed lines: the line has left its seed once it is further
+        # than one step from it, and closes when a step passes within
+        # half a step of the seed (the closure distance follows the
+        # local step size)
+        px, pz, g = x[a], z[a], h[a]
+        qx, qz = X[j]-px, Z[j]-pz
+        t = ((XS[j]-px)*qx+(ZS[j]-pz)*qz)/maximum(qx*qx+qz*qz, 1E-300)
+        t = minimum(maximum(t, 0.0), 1.0)
+        d = hypot(px+t*qx-XS[j], pz+t*qz-ZS[j])
+        r = left[j] & (d < g/2)
+        left[j] |= hypot(X[j]-XS[j], Z[j]-ZS[j]) > g
+        X[j[r]], Z[j[r]] = XS[j[r]], ZS[j[r]]
+        closed[j[r]] = True
+        L[j[r]] = length
+        R.append((j, X[j], Z[j]))
+        # new step sizes
+        f = 0.9*(tol/maximum(e, 1E-300))**0.2
+        f[~isfinite(f)] = 0.2
+        H[i] = minimum(maximum(h*minimum(maximum(f, 0.2), 5.0), hmin), hmax)
+    # collect the points of each line (the order of the
+    # steps is kept by the stable sort)
+    J = concatenate([r[0] for r in R])
+    PX = concatenate([r[1] for r in R])
+    PZ = concatenate([r[2] for r in R])
+    o = argsort(J, kind = "stable")
+    J, PX, PZ = J[o], PX[o], PZ[o]
+    b = concatenate(([0], (J[1:] != J[:-1]).nonzero()[0]+1, [len(J)]))
+    P = [(PX[p:q], PZ[p:q]) for p, q in zip(b[:-1], b[1:])]
+    # join the backward and the forward lines
+    if not both:
+        return P, list(closed)
+    Lines, Closed = [], []
+    for k in range(n):
+        (fx, fz), (bx, bz) = P[k], P[k+n]
+        if closed[k]:
+            Lines.append((fx, fz))
+        elif closed[k+n]:
+            Lines.append((bx[::-1], bz[::-1]))
+        else:
+            Lines.append((
+                concatenate((bx[:0:-1], fx)),
+                concatenate((bz[:0:-1], fz))))
+        Closed.append(bool(closed[k] or closed[k+n]))
+    return Lines, Closed
+
+if __name__ == "__main__":
+
+    from pslib import document
+    from pygnetti import coil
+
+    # coil of the "pygnetti.py" demonstration
+    c = coil()
+    c.set_geometry(radius = 15, height = 5.0, turns = 5, layers = 10)
+
+    # seeds on the axis Ox (inside the bore)
+    X0 = [1.0, 3.0, 5.0, 7.0, 9.0, 11.0, 13.0]
+    Lines, Closed = tracelines(c, X0, [0.0]*len(X0),
+        length = 500.0, box = (-60.0, 60.0, -80.0, 80.0))
+
+    with document(Path = "fieldlines", Size = "A5", Type = "eps") as d:
+        d.rgbcolor(0.8, 0.1, 0.3)
+        d.thickness(0.01)
+        c.draw_wires(d)
+        d.rgbcolor(0.1, 0.3, 0.9)
+        d.thickness(0.1)
+        d.polylines(Lines)
+        d.polylines([(-x, z) for x, z in Lines])
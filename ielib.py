@@ -5,7 +5,8 @@
 # repository: https://github.com/RochSchanen/postscript_dev
 # comment: early stages of development
 
-def file_export(fp, *dt, fm = "+.6E"):
+# "cm" is a list of comment lines added to the header
+def file_export(fp, *dt, fm = "+.6E", cm = ()):
     from os.path import basename
     from time import strftime, gmtime
     # get time stamp
@@ -21,6 +22,7 @@ def file_export(fp, *dt, fm = "+.6E"):
     fh = open(fp, 'w')
     fh.write(f'# file: {basename(fp)}\n')
     fh.write(f'# created: {ts}\n')
+    for c in cm: fh.write(f'# {c}\n')
     # write lines
     for j in range(min(N)):
         # write columns
@@ -2,128 +2,208 @@
 # file: optimize.py
 # author: Roch Schanen
 # created: 20200519
-# modified: 20240508
+# modified: 20261018
 # content: build optimisation tables for pygnetti
 # repository: https://github.com/RochSchanen/pygnetti
 
-
-# from "https://matplotlib.org/"
-from matplotlib.pyplot import subplots
-from matplotlib.pyplot import show
+# the tables are built without any plotting dependency (run
+# "python3 optimize.py --help"): matplotlib is only required
+# by the optional plots.
 
 # from "https://numpy.org/"
-from numpy import cos
-from numpy import pi
 from numpy import sqrt
-from numpy import linspace
-from numpy import empty_like
-from numpy import append
-from numpy import insert
+from numpy import empty
 
 # from local module "ielib.py"
 from ielib import file_export, file_import
 
+# from local module "quadlib.py"
+from quadlib import computeJ1J2
+
+# from local module "pygnetti.py"
+from pygnetti import cubicgrid
+
 ################################################## INTEGRATION
 
-# elliptic integrals I1 and I2
-# brute numerical integration
-# there is no optimisation
-# it is used for computing optimisation tables
-# note that these integrals diverge at -1.0 and +1.0
-def computeI1I2(
-        alpha = 0.0,    # integration variable
-        n = 100):       # number of intervals
-    i1, i2 = 0.0, 0.0
-    t, dt  = 0.0, 2*pi/n
-    for i in range(n):
-        c = cos(t)
-        m = 1.0-alpha*c
-        d = sqrt(m*m*m)
-        i1 += c/d
-        i2 += 1.0/d
-        t  += dt
-    return i1*dt, i2*dt
-
-################################################## I1 and I2
-
-# load table from file if available
-data = file_import('./I1I2.txt')
-if data is not None:
-	A, I1, I2 = data
-else:
-	dA = 0.0001
-	# discretise the range of integration
-	A  = linspace(-1.000+dA, 1.000-dA, int(2.0/dA-1))
-	# prepare the result tables
-	I1, I2 = empty_like(A), empty_like(A)
-	# compute the integrals: a thousand subdivisions for
-	# evaluating the integral seams to be, empirically,
-	# a good number.
-	for i in range(len(A)):
-		I1[i], I2[i] = computeI1I2(A[i], n = 1000)
-	# export the results
-	file_export('./I1I2.txt', A, I1, I2)
-
-# make a plot for illustrations
-fig0, ax0 = subplots()
-fig0.set_size_inches(7, 7)
-ax0.plot(A, I1, label = r'$I_1$')
-ax0.plot(A, I2, label = r'$I_2$')
-ax0.set_xlabel('alpha')
-ax0.set_ylabel(r'$I_1, I_2$')
-ax0.set_title('Integrals')
-ax0.legend()
-ax0.grid()
+# The elliptic integrals I1 and I2 are integrated by the
+# adaptive Gauss-Kronrod quadrature of "quadlib.py": the
+# integrands become sharply peaked as alpha approaches -1.0
+# or +1.0 and the intervals are bisected only near the peak.
+# The quadrature returns the normalised integrals J1 and J2
+# (see below), an error estimate for each value of alpha, and
+# the number of integrand evaluations. The tolerance "qtol"
+# must remain well below the interpolation tolerance "tol".
+
+################################################## TABLE NODES
+
+# the curvature of J1 and J2 grows without bound near the end
+# points (J-1 behaves like (1-alpha)log(1-alpha)), this is where
+# a uniform table is the least accurate. The nodes are therefore
+# distributed on the cubic grid defined in pygnetti.py, where
+# the index of a node is found directly from the value of alpha.
+
+# build the J1, J2 table on a cubic grid by bisection: all the
+# intervals are split until the interpolation error at their
+# mid points is smaller than "tol". The values computed at the
+# mid points are kept for the next bisection. It returns the
+# nodes, the tables, the quadrature error estimates at the
+# nodes, the interpolation error, and the total number of
+# integrand evaluations.
+def buildJ1J2(
+        tol  = 1E-7,    # maximum interpolation error
+        qtol = 1E-12,   # quadrature tolerance
+        n    = 64,      # initial number of intervals
+        nmax = 2**18):  # maximum number of intervals
+    # compute the initial nodes
+    A = cubicgrid(n+1)
+    J1, J2, E1, E2, N = computeJ1J2(A, qtol)
+    N = N.sum()
+    while True:
+        # compute the mid points (in u)
+        M = cubicgrid(2*n+1)[1::2]
+        K1, K2, F1, F2, Q = computeJ1J2(M, qtol)
+        N += Q.sum()
+        # the interpolation is linear in u: at
+        # the mid points, it is the mean value
+        e1 = abs(K1-(J1[:-1]+J1[1:])/2).max()
+        e2 = abs(K2-(J2[:-1]+J2[1:])/2).max()
+        e = max(e1, e2)
+        if e < tol or 2*n > nmax: break
+        # merge nodes and mid points
+        J1, J2 = merge(J1, K1), merge(J2, K2)
+        E1, E2 = merge(E1, F1), merge(E2, F2)
+        A, n = cubicgrid(2*n+1), 2*n
+    # done
+    return A, J1, J2, E1, E2, e, N
+
+# interleave nodes and mid points
+def merge(X, Y):
+    Z = empty(len(X)+len(Y))
+    Z[0::2], Z[1::2] = X, Y
+    return Z
 
 ################################################## J1 and J2
 
-# normalised elliptic integrals J1 and J2
-# load table from file if available
-data = file_import('./J1J2.txt')
-if data is not None:
-	A, J1, J2 = data
-else:
-
-	# Normalisation of I1 and I2
-	# The sqrt(32) can be found when analysing
-	# the asymptotic behaviour of J1 and J2 at
-	# the end points (alpha = -1.0 or +1.0)
-	
-	J1 = I1*(1.0-A)*(1.0+A)/sqrt(32)
-	J2 = I2*(1.0-A)*(1.0+A)/sqrt(32)
-
-	# The normalised functions have computable
-	# theoretical limits through analysis:
-	# at +1.0, (J1, J2) = (+1.0, +1.0)
-	# at -1.0, (J1, J2) = (-1.0, +1.0)
-	# These limit points are added by hand in
-	# the tables.
-
-	# at +1.0
-	A  = append(A,  +1.0)
-	J1 = append(J1, +1.0)
-	J2 = append(J2, +1.0)
-
-	# at -1.0
-	A  = insert(A,  0, -1.0)
-	J1 = insert(J1, 0, -1.0)
-	J2 = insert(J2, 0, +1.0)
-	
-	# export the results
-	file_export('./J1J2.txt', A, J1, J2)
-
-# make a plot for illustrations
-fig1, ax1 = subplots()
-fig1.set_size_inches(7, 7)
-J1_label = r'$J_1 = I_1(1-\alpha)(1+\alpha)/\sqrt{32}$'
-J2_label = r'$J_2 = I_2(1-\alpha)(1-\alpha)/\sqrt{32}$'
-ax1.plot(A, J1, label = J1_label)
-ax1.plot(A, J2, label = J2_label)
-ax1.set_xlabel(r'$\alpha$')
-ax1.set_ylabel(r'$J_1, J_2$')
-ax1.set_title('Normalised Integrals')
-ax1.legend()
-ax1.grid()
+# Normalisation of I1 and I2
+# The sqrt(32) can be found when analysing
+# the asymptotic behaviour of J1 and J2 at
+# the end points (alpha = -1.0 or +1.0)
+
+# J1 = I1*(1.0-A)*(1.0+A)/sqrt(32)
+# J2 = I2*(1.0-A)*(1.0+A)/sqrt(32)
+
+# The normalised functions have computable
+# theoretical limits through analysis:
+# at +1.0, (J1, J2) = (+1.0, +1.0)
+# at -1.0, (J1, J2) = (-1.0, +1.0)
+# These limit points are the first and
+# last nodes of the table.
+
+# build the tables and export them to the directory "path":
+# J1J2.txt (normalised integrals at the nodes) and I1I2.txt
+# (intermediate results with their error estimates). Existing
+# tables are loaded instead, unless "force" is set. Returns
+# the J1J2 and I1I2 tables.
+def maketables(path = ".", tol = 1E-7, qtol = 1E-12, force = False,
+        verbose = True):
+
+    # normalised elliptic integrals J1 and J2
+    # load table from file if available
+    data = None if force else file_import(f'{path}/J1J2.txt')
+    if data is not None:
+        A, J1, J2 = data
+    else:
+        A, J1, J2, E1, E2, e, N = buildJ1J2(tol, qtol)
+        q = max(E1.max(), E2.max())
+        # report the error estimates
+        report = [
+            f"nodes: {len(A)} (cubic grid)",
+            f"interpolation error: {e:.1E}",
+            f"quadrature error: {q:.1E}",
+            f"integrand evaluations: {N}",
+        ]
+        if verbose:
+            for r in report: print(r)
+        # export the results (the precision of the nodes
+        # must be kept for the cubic grid to be recognised)
+        file_export(f'{path}/J1J2.txt', A, J1, J2,
+            fm = "+.12E", cm = report)
+
+    # elliptic integrals I1 and I2
+    # load table from file if available
+    data = None if force else file_import(f'{path}/I1I2.txt')
+    if data is not None:
+        B, I1, I2 = data[:3]
+    else:
+        # I1 and I2 diverge at the end points which are
+        # excluded from the intermediate results
+        B = A[1:-1]
+        K1, K2, E1, E2, N = computeJ1J2(B, qtol)
+        f = sqrt(32)/(1.0-B)/(1.0+B)
+        I1, I2 = K1*f, K2*f
+        # export the results with the error estimates
+        file_export(f'{path}/I1I2.txt', B, I1, I2, E1*f, E2*f,
+            fm = "+.12E")
+
+    # done
+    return (A, J1, J2), (B, I1, I2)
+
+################################################## VALIDATION
+
+# check the table file against the reference integrals (see
+# "validate.py"): the table must be a cubic grid (or searching
+# the nodes would slow down the kernel) and its maximum error
+# must remain below "tol". Returns True if the table is valid.
+def checktable(path = "./J1J2.txt", tol = 1E-7, verbose = True):
+    from validate import sample_alpha, check_table
+    from pygnetti import coil
+    c = coil(path)
+    A = sample_alpha()
+    R1, R2, E1, E2, N = computeJ1J2(A)
+    m, r, t = check_table(c, A, R1, R2)
+    valid = c.cubic and m < tol
+    if verbose:
+        print(f"table '{path}': {len(c.A)} nodes, "
+            f"{'cubic' if c.cubic else 'not a cubic'} grid, "
+            f"max error {m:.1E}, rms error {r:.1E}: "
+            f"{'valid' if valid else 'FAILED'}")
+    return valid
+
+################################################## PLOTS
+
+# make plots for illustrations (matplotlib is only
+# imported here: it is an optional dependency)
+def plottables(J, I):
+    # from "https://matplotlib.org/"
+    from matplotlib.pyplot import subplots
+    from matplotlib.pyplot import show
+
+    (A, J1, J2), (B, I1, I2) = J, I
+
+    fig0, ax0 = subplots()
+    fig0.set_size_inches(7, 7)
+    ax0.plot(B, I1, label = r'$I_1$')
+    ax0.plot(B, I2, label = r'$I_2$')
+    ax0.set_xlabel('alpha')
+    ax0.set_ylabel(r'$I_1, I_2$')
+    ax0.set_title('Integrals')
+    ax0.legend()
+    ax0.grid()
+
+    fig1, ax1 = subplots()
+    fig1.set_size_inches(7, 7)
+    J1_label = r'$J_1 = I_1(1-\alpha)(1+\alpha)/\sqrt{32}$'
+    J2_label = r'$J_2 = I_2(1-\alpha)(1-\alpha)/\sqrt{32}$'
+    ax1.plot(A, J1, label = J1_label)
+    ax1.plot(A, J2, label = J2_label)
+    ax1.set_xlabel(r'$\alpha$')
+    ax1.set_ylabel(r'$J_1, J_2$')
+    ax1.set_title('Normalised Integrals')
+    ax1.legend()
+    ax1.grid()
+
+    show()
+    return
 
 ##################################################
 
@@ -131,13 +211,42 @@ ax1.grid()
 # 2) interpolate the existing data. Empirically, a polynomial interpolation
 # requires a fairly large degree to remain accurate. this sensibly increases
 # the time of computation. In contrast, on a finite interval (-1.0 to +1.0)
-# with a fairly large number of points (20000), the interpolation method works
-# very fast and remains accurate. Since a large amounts of memory allocation
-# is not any more an issue in this day and age, the second solution has been
-# selected in pygnetti.py
+# the interpolation method works very fast and remains accurate. Since a
+# large amounts of memory allocation is not any more an issue in this day
+# and age, the second solution has been selected in pygnetti.py. A uniform
+# table of 20001 points has an error of about 1E-5 near the end points, the
+# cubic grid reaches 1E-7 everywhere with less than half the points.
 
 ##################################################
 
-show()
-
-# The full computation takes less than one minute on an HP EliteOne 800
+# command line entry point: build (or load) the tables,
+# validate them and optionally plot them. The exit status
+# is non-zero when the table fails the validation.
+def main(argv = None):
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description = "build the pygnetti tables")
+    parser.add_argument("--path", default = ".",
+        help = "directory of the tables")
+    parser.add_argument("--tol", type = float, default = 1E-7,
+        help = "maximum interpolation error")
+    parser.add_argument("--qtol", type = float, default = 1E-12,
+        help = "quadrature tolerance")
+    parser.add_argument("--force", action = "store_true",
+        help = "rebuild existing tables")
+    parser.add_argument("--plot", action = "store_true",
+        help = "plot the tables (requires matplotlib)")
+    parser.add_argument("--quiet", action = "store_true",
+        help = "no output")
+    args = parser.parse_args(argv)
+    J, I = maketables(args.path, args.tol, args.qtol, args.force,
+        verbose = not args.quiet)
+    valid = checktable(f"{args.path}/J1J2.txt", args.tol,
+        verbose = not args.quiet)
+    if args.plot: plottables(J, I)
+    return 0 if valid else 1
+
+if __name__ == "__main__":
+    from sys import exit
+    exit(main())
+
+# The full computation takes about a second
@@ -0,0 +1,575 @@
+#!/usr/bin/python3
+# file: pdflib.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: homemade pdf package
+# repository: https://github.com/RochSchanen/pygnetti
+# comment: same drawing interface as pslib.py
+
+# The pdf document is written in one pass: the objects are sent
+# to the file as soon as they are complete and their offsets are
+# recorded for the cross reference table (written at the end).
+# The content of a page is compressed (Flate) while it is drawn,
+# by chunks of the buffer: the length of the stream is therefore
+# written after the stream, as an indirect object. The objects
+# defined while a page is drawn (circles, arrow heads, images) are
+# written after its content stream. The coordinates are given in
+# mm with the origin at the centre of the page, as in pslib.py.
+
+# from "https://numpy.org/"
+from numpy import asarray
+from numpy import rint
+from numpy import empty
+from numpy import full
+from numpy import where
+from numpy import hypot
+from numpy import frombuffer
+from numpy import int64
+from numpy import uint8
+from numpy import concatenate
+
+# from the standard library
+from zlib import compressobj, compress
+
+# from local module "pslib.py"
+from pslib import document as psdocument
+from pslib import papersize, exitProcess, fix, sca, _units, EOL, SPC
+
+# fixed point characters of the values V [points] (as "fix()"
+# would format them): one row of bytes per value
+def fixchars(V):
+    Q = rint(asarray(V, dtype = float).reshape(-1)*1000.0).astype(int64)
+    A = abs(Q)
+    w = max(3, len(str(A.max()//1000))) if len(A) else 3
+    B = empty((len(Q), w+5), dtype = uint8)
+    B[:, 0] = where(Q < 0, ord("-"), ord("+"))
+    for k in range(w+3):
+        c = w+4-k if k < 3 else w+3-k
+        B[:, c] = A//10**k%10+ord("0")
+    B[:, w+1] = ord(".")
+    return B
+
+# vectorised content rows: the items are operators (strings),
+# arrays of values [points], or arrays of characters (uint8, one
+# row per element). Each element of the arrays makes one row,
+# the items are separated by spaces.
+def rows(*Items):
+    N = next(len(i) for i in Items if not isinstance(i, str))
+    C = []
+    for i in Items:
+        if isinstance(i, str):
+            C.append(frombuffer(i.encode("latin-1"), dtype = uint8)[None, :])
+        elif i.dtype == uint8:
+            C.append(i.reshape(N, -1))
+        else:
+            C.append(fixchars(i))
+    M = full((N, sum(c.shape[1]+1 for c in C)), ord(SPC), dtype = uint8)
+    p = 0
+    for c in C:
+        M[:, p:p+c.shape[1]] = c
+        p += c.shape[1]+1
+    M[:, -1] = ord(EOL)
+    return M.tobytes()
+
+# escape the special characters of pdf strings
+def escape(txt):
+    return txt.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+# circle path of radius r [points] centred on the origin (four
+# Bezier curves)
+def _circle(r):
+    k = 0.5522847498*r
+    return (f"{fix(r, 0)} m "
+        f"{fix(r, k, k, r, 0, r)} c "
+        f"{fix(-k, r, -r, k, -r, 0)} c "
+        f"{fix(-r, -k, -k, -r, 0, -r)} c "
+        f"{fix(k, -r, r, -k, r, 0)} c h")
+
+# pdf document class
+class document(psdocument):
+
+    # open file, write header, and start the first page
+    def __init__(self,
+            Path    = "p",  # default filename
+            Size    = "A4", # default page size
+            Type    = "pdf",# pdf only
+            Stream  = None, # or any binary stream (file, pipe, ...)
+            Chunk   = 1<<16,# buffer size (characters)
+            Level   = 6,    # compression level (1 fast, 9 small)
+        ):
+
+        # initialise page counter
+        self.n = 1
+
+        # setup document size
+        w, h = papersize(Size)
+        self.size = w*_units, h*_units
+
+        # get file handle (binary)
+        fh = open(f"{Path}.{Type}", 'wb') if Stream is None else Stream
+        if fh is None:
+            exitProcess(f"failed to open '{Path}'.")
+        self.fh, self.own = fh, Stream is None
+
+        # buffer of the current page content
+        self.buffer, self.buffered, self.chunk = [], 0, Chunk
+        self.level = Level
+
+        # objects: offsets, number of objects, bytes written,
+        # page objects (by page number), objects waiting for
+        # the end of the content stream, forms and images
+        self.offsets, self.nobj, self.pos = {}, 0, 0
+        self.pages, self.pending, self.xobjects = {}, [], {}
+
+        # header, catalog (1), page tree (2, at the end), font (3)
+        self.out(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.catalog, self.tree, self.font = self.new(), self.new(), self.new()
+        self.object(self.catalog,
+            f"<< /Type /Catalog /Pages {self.tree} 0 R >>")
+        self.object(self.font,
+            "<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
+
+        # first page
+        self.begin()
+
+        # constants for the user
+        self.LEFT, self.RIGHT  = -w/2.0, +w/2.0
+        self.TOP,  self.BOTTOM = +h/2.0, -h/2.0
+        # note: the origin (point 0 0) is at the centre of the page
+
+        # done
+        return
+
+    ###############
+    ### OBJECTS ###
+    ###############
+
+    # write bytes to the file
+    def out(self, b):
+        self.fh.write(b)
+        self.pos += len(b)
+        return
+
+    # allocate an object number
+    def new(self):
+        self.nobj += 1
+        return self.nobj
+
+    # write the object "num" (the dictionary "d", and the
+    # stream "s" when given)
+    def object(self, num, d, s = None):
+        self.offsets[num] = self.pos
+        self.out(f"{num} 0 obj{EOL}{d}{EOL}".encode("latin-1"))
+        if s is not None:
+            self.out(b"stream\n"+s+b"\nendstream\n")
+        self.out(b"endobj\n")
+        return
+
+    # object number of the page "n" (allocated on first use:
+    # the links can point to the next pages)
+    def page(self, n):
+        if n not in self.pages:
+            self.pages[n] = self.new()
+        return self.pages[n]
+
+    # form (reusable drawing) "key": returns its name (the form
+    # is recorded in the resources of the current page)
+    def form(self, key, content):
+        if key not in self.xobjects:
+            name, num = f"X{len(self.xobjects)}", self.new()
+            w, h = self.size
+            self.pending.append((num, f"<< /Type /XObject /Subtype /Form "
+                f"/BBox [{fix(-w, -h, w, h)}] "
+                f"/Length {len(content)} >>", content.encode("latin-1")))
+            self.xobjects[key] = name, num
+        name, num = self.xobjects[key]
+        self.used[name] = num
+        return name
+
+    #############
+    ### PAGES ###
+    #############
+
+    # start the content stream of a page (the origin is
+    # set at the centre of the page)
+    def begin(self):
+        self.content, self.length = self.new(), self.new()
+        # annotations and xobjects (name: object) of the page
+        self.annots, self.used = [], {}
+        self.offsets[self.content] = self.pos
+        self.out(f"{self.content} 0 obj{EOL}"
+            f"<< /Length {self.length} 0 R /Filter /FlateDecode >>{EOL}"
+            f"stream{EOL}".encode("latin-1"))
+        self.z, self.zn = compressobj(self.level), 0
+        w, h = self.size
+        self.put(f"1 0 0 1 {w/2:.0f} {h/2:.0f} cm{EOL}")
+        return
+
+    # complete the content stream, write the pending objects
+    # and the page object
+    def end(self):
+        self.flush()
+        b = self.z.flush()
+        self.out(b)
+        self.zn += len(b)
+        self.out(b"\nendstream\nendobj\n")
+        self.object(self.length, f"{self.zn}")
+        for num, d, s in self.pending:
+            self.object(num, d, s)
+        self.pending = []
+        w, h = self.size
+        X = " ".join(f"/{name} {num} 0 R" for name, num in self.used.items())
+        A = f" /Annots [{' '.join(self.annots)}]" if self.annots else ""
+        self.object(self.page(self.n), f"<< /Type /Page /Parent {self.tree} 0 R "
+            f"/MediaBox [0 0 {w:.0f} {h:.0f}] /Contents {self.content} 0 R "
+            f"/Resources << /Font << /F1 {self.font} 0 R >> "
+            f"/XObject << {X} >> >>{A} >>")
+        return
+
+    # add a new page to the document
+    # (origin selection not yet implemented)
+    def newpage(self, Origin = "tl"):
+        self.end()
+        self.n += 1
+        self.begin()
+        return
+
+    # write text (or bytes) to the page buffer
+    def put(self, Text):
+        if isinstance(Text, str):
+            Text = Text.encode("latin-1")
+        self.buffer.append(Text)
+        self.buffered += len(Text)
+        if self.buffered > self.chunk:
+            self.flush()
+        return
+
+    # write a block (see pslib.py) to the page buffer
+    def write(self, Block):
+        for l in Block[len(EOL):].split(EOL):
+            self.put(l.lstrip()+EOL)
+        return
+
+    # compress the buffer into the content stream
+    def flush(self):
+        b = self.z.compress(b"".join(self.buffer))
+        self.out(b)
+        self.zn += len(b)
+        self.buffer, self.buffered = [], 0
+        return
+
+    # write the rows (see "rows()") by chunks of "m" elements
+    def bulk(self, *Items, m = 1<<14):
+        N = next(len(i) for i in Items if not isinstance(i, str))
+        for k in range(0, N, m):
+            self.put(rows(*(i if isinstance(i, str) else i[k:k+m]
+                for i in Items)))
+        return
+
+    # the closing of the document: complete the last page,
+    # write the page tree, the cross reference table and the
+    # trailer (see pslib.py for the context manager usage)
+    def close(self):
+        if getattr(self, "fh", None):
+            self.end()
+            # the pages linked but never drawn
+            for n, num in self.pages.items():
+                if num not in self.offsets:
+                    self.object(num, "null")
+            # page tree
+            K = " ".join(f"{self.page(n)} 0 R" for n in range(1, self.n+1))
+            self.object(self.tree,
+                f"<< /Type /Pages /Kids [{K}] /Count {self.n} >>")
+            # cross reference table
+            x = self.pos
+            X = [f"xref{EOL}0 {self.nobj+1}{EOL}0000000000 65535 f{SPC}{EOL}"]
+            for num in range(1, self.nobj+1):
+                X.append(f"{self.offsets[num]:010d} 00000 n{SPC}{EOL}")
+            X.append(f"trailer{EOL}<< /Size {self.nobj+1} "
+                f"/Root {self.catalog} 0 R >>{EOL}"
+                f"startxref{EOL}{x}{EOL}%%EOF{EOL}")
+            self.out("".join(X).encode("latin-1"))
+            # close file (if owned)
+            if self.own:
+                self.fh.close()
+            self.fh = None
+        return
+
+    ##################
+    ### CROSS HAIR ###
+    ##################
+
+    def displayCrosshair(self, size = 50.0):
+        l, r = -size/2.0, +size/2.0
+        b, t = -size/2.0, +size/2.0
+        self.write(f'''
+        % --- CROSSHAIR ---
+        {sca(l, b)} {sca(r-l, t-b)} re S
+        q 0.3 w [1 3 12 3] 0 d
+        {sca(l, 0.0)} m {sca(r, 0.0)} l S
+        {sca(0.0, b)} m {sca(0.0, t)} l S
+        Q
+        ''')
+        return
+
+    ##############
+    ### STYLES ###
+    ##############
+
+    def thickness(self, Value):
+        self.write(f"""
+            % --- SET THICKNESS ---
+            {sca(Value)} w
+            """)
+        return
+
+    # A value of '0.0' is white.
+    # A value of '1.0' is black.
+    def graycolor(self, Value):
+        self.write(f"""
+            % --- SET GRAYSCALE ---
+            {1.0-Value:.2f} G {1.0-Value:.2f} g
+            """)
+        return
+
+    def rgbcolor(self, r, g, b):
+        self.write(f"""
+            % --- SET COLOR ---
+            {r:.2f} {g:.2f} {b:.2f} RG {r:.2f} {g:.2f} {b:.2f} rg
+            """)
+        return
+
+    def dash(self, *dashes):
+        # default (no parameters) is a solid line
+        s = sca(*dashes) if len(dashes)>0 else ""
+        self.write(f"""
+            % --- SET DASH ---
+            [{s}] 0 d
+            """)
+        return
+
+    #############
+    ### LINES ###
+    #############
+
+    def hline(self, Position = 0.0, lm = 0, rm = 0):
+        return self.hlines(Position, lm = lm, rm = rm)
+
+    def vline(self, Position = 0.0, tm = 0, bm = 0):
+        return self.vlines(Position, tm = tm, bm = bm)
+
+    def hlines(self, *Positions, lm = 0, rm = 0):
+        w, h = self.size
+        P = asarray(Positions, dtype = float)*_units
+        self.put(f"% --- HORIZONTAL LINES ---{EOL}")
+        self.bulk(fix(-w/2.0+lm*_units), P, "m", fix(+w/2.0-rm*_units), P, "l S")
+        return
+
+    def vlines(self, *Positions, tm = 0, bm = 0):
+        w, h = self.size
+        P = asarray(Positions, dtype = float)*_units
+        self.put(f"% --- VERTICAL LINES ---{EOL}")
+        self.bulk(P, fix(+h/2.0-tm*_units), "m", P, fix(-h/2.0+bm*_units), "l S")
+        return
+
+    def hgrid(self, Start, Stop, nLines, lm = 0, rm = 0):
+        i = (Stop-Start)/(nLines-1)
+        return self.hlines(*(Start+k*i for k in range(nLines)), lm = lm, rm = rm)
+
+    def vgrid(self, Start, Stop, nLines, tm = 0, bm = 0):
+        i = (Stop-Start)/(nLines-1)
+        return self.vlines(*(Start+k*i for k in range(nLines)), tm = tm, bm = bm)
+
+    def line(self, x1, y1, x2, y2):
+        self.write(f'''
+        % --- SINGLE LINE ---
+        {sca(x1, y1)} m {sca(x2, y2)} l S
+        ''')
+        return
+
+    # draw the points (x, y) as a single path
+    def polyline(self, x, y, Closed = False):
+        x = asarray(x, dtype = float).reshape(-1)*_units
+        y = asarray(y, dtype = float).reshape(-1)*_units
+        if len(x) < 2: return
+        self.put(f"% --- POLYLINE ---{EOL}{fix(x[0], y[0])} m{EOL}")
+        self.bulk(x[1:], y[1:], "l")
+        self.put(f"{'h ' if Closed else ''}S{EOL}")
+        return
+
+    # draw a list of polylines [(x, y), ...] as a single path
+    def path(self, Lines):
+        Lines = [(asarray(x, dtype = float).reshape(-1),
+            asarray(y, dtype = float).reshape(-1)) for x, y in Lines]
+        Lines = [(x, y) for x, y in Lines if len(x) > 1]
+        if not Lines: return
+        x = concatenate([x for x, y in Lines])*_units
+        y = concatenate([y for x, y in Lines])*_units
+        # "m" at the first point of each polyline, "l" otherwise
+        f = full(len(x), ord("l"), dtype = uint8)
+        f[concatenate(([0], [len(x) for x, y in Lines]))[:-1].cumsum()] = ord("m")
+        self.put(f"% --- PATH ---{EOL}")
+        self.bulk(x, y, f)
+        self.put(f"S{EOL}")
+        return
+
+    ###############
+    ### CIRCLES ###
+    ###############
+
+    def circle(self, x, y, r):
+        self.write(f'''
+        % --- SINGLE CIRCLE ---
+        q 1 0 0 1 {sca(x, y)} cm {_circle(r*_units)} S Q
+        ''')
+        return
+
+    def circles(self, x, y, r):
+        X = self.form(("circle", r), f"{_circle(r*_units)} S")
+        x = asarray(x, dtype = float).reshape(-1)*_units
+        y = asarray(y, dtype = float).reshape(-1)*_units
+        self.put(f"% --- MULTIPLE CIRCLES ---{EOL}[] 0 d{EOL}")
+        self.bulk("q 1 0 0 1", x, y, f"cm /{X} Do Q")
+        return
+
+    def disks(self, x, y, r):
+        X = self.form(("disk", r), f"{_circle(r*_units)} f")
+        x = asarray(x, dtype = float).reshape(-1)*_units
+        y = asarray(y, dtype = float).reshape(-1)*_units
+        self.put(f"% --- MULTIPLE DISKS ---{EOL}[] 0 d{EOL}")
+        self.bulk("q 1 0 0 1", x, y, f"cm /{X} Do Q")
+        return
+
+    ##################
+    ### RECTANGLES ###
+    ##################
+
+    def rectangle(self, x1, y1, x2, y2):
+        self.write(f'''
+        % --- SINGLE RECTANGLE ---
+        {sca(x1, y1, x2-x1, y2-y1)} re S
+        ''')
+        return
+
+    def box(self, x1, y1, x2, y2):
+        self.write(f'''
+        % --- SINGLE BOX ---
+        {sca(x1, y1, x2-x1, y2-y1)} re f
+        ''')
+        return
+
+    ##############
+    ### ARROWS ###
+    ##############
+
+    # the arrow head is a form (pointing up, centred on the
+    # origin) which is rotated and placed at the arrow end
+    def define_arrow_style(self, size = 3, ratio = 0.5):
+        h, w = size, size*ratio
+        self.arrowsize = size
+        self.arrowhead = self.form(("arrow", h, w),
+            f"{sca(0.0, h/2.0)} m {sca(-w/2.0, -h/2.0)} l "
+            f"{sca(w/2.0, -h/2.0)} l h f")
+        return
+
+    def arrow(self, x, y, dx, dy):
+        return self.arrows([x], [y], [dx], [dy])
+
+    # the options "Cull", "Cell" and "Mean" reduce
+    # the number of vectors (see pslib.py)
+    def arrows(self, x, y, dx, dy, Cull = False, Cell = None, Mean = False):
+        if not hasattr(self, "arrowhead"):
+            self.define_arrow_style()
+        if Cull or Cell:
+            x, y, dx, dy = self.reduce(x, y, dx, dy, Cull, Cell, Mean)
+        x = asarray(x, dtype = float).reshape(-1)*_units
+        y = asarray(y, dtype = float).reshape(-1)*_units
+        dx = asarray(dx, dtype = float).reshape(-1)*_units
+        dy = asarray(dy, dtype = float).reshape(-1)*_units
+        if len(x) == 0: return
+        # unit vectors (up for the null vectors)
+        d = hypot(dx, dy)
+        n = d > 0.0
+        ux = where(n, dx/where(n, d, 1.0), 0.0)
+        uy = where(n, dy/where(n, d, 1.0), 1.0)
+        self.put(f"% --- MULTIPLE VECTORS ---{EOL}[] 0 d{EOL}")
+        # shafts (one path) and heads
+        self.bulk(x, y, "m", x+dx, y+dy, "l")
+        self.put(f"S{EOL}")
+        self.bulk("q", uy, -ux, ux, uy, x+dx, y+dy, f"cm /{self.arrowhead} Do Q")
+        return
+
+    #############
+    ### IMAGE ###
+    #############
+
+    # draw the image "RGB" (see pslib.py) in the rectangle
+    # (x1, y1, x2, y2), the image is compressed (Flate)
+    def image(self, x1, y1, x2, y2, RGB):
+        RGB = asarray(RGB, dtype = uint8)
+        h, w = RGB.shape[:2]
+        n = 3 if RGB.ndim == 3 else 1
+        # the first row of a pdf image is at the top
+        s = compress(RGB[::-1].tobytes(), self.level)
+        name, num = f"I{len(self.xobjects)}", self.new()
+        self.pending.append((num, f"<< /Type /XObject /Subtype /Image "
+            f"/Width {w} /Height {h} /BitsPerComponent 8 "
+            f"/ColorSpace /Device{'RGB' if n == 3 else 'Gray'} "
+            f"/Filter /FlateDecode /Length {len(s)} >>", s))
+        self.xobjects[("image", num)] = name, num
+        self.used[name] = num
+        self.write(f'''
+        % --- IMAGE ---
+        q {sca(x2-x1)} 0 0 {sca(y2-y1)} {sca(x1, y1)} cm /{name} Do Q
+        ''')
+        return
+
+    ############
+    ### TEXT ###
+    ############
+
+    def text(self, x, y, txt):
+        self.write(f'''
+        % --- TEXT ---
+        BT /F1 12 Tf {sca(x, y)} Td ({escape(txt)}) Tj ET
+        ''')
+        return
+
+    def vtext(self, x, y, txt):
+        self.write(f'''
+        % --- TEXT ---
+        BT /F1 12 Tf 0 1 -1 0 {sca(x, y)} Tm ({escape(txt)}) Tj ET
+        ''')
+        return
+
+    ############
+    ### META ###
+    ############
+
+    # link the rectangle (l, r, t, b) to the page "page"
+    def pagelink(self, l, r, t, b, page, showborder = False):
+        w, h = self.size
+        self.annots.append(f"<< /Type /Annot /Subtype /Link "
+            f"/Rect [{fix(l*_units+w/2, b*_units+h/2, r*_units+w/2, t*_units+h/2)}] "
+            f"/Border [0 0 {1 if showborder else 0}] "
+            f"/Dest [{self.page(page)} 0 R /XYZ 0 {h:.0f} null] >>")
+        return
+
+if __name__ == "__main__":
+
+    from numpy import linspace, meshgrid
+
+    with document(Path = "p", Size = "A5") as p:
+        p.displayCrosshair()
+        p.text(-20.0, 40.0, "page 1 (next page)")
+        p.pagelink(-20.0, 20.0, 45.0, 38.0, 2, showborder = True)
+        x = linspace(-30.0, 30.0, 31)
+        X, Y = meshgrid(x, x)
+        p.define_arrow_style(1.0)
+        p.rgbcolor(0.1, 0.3, 0.9)
+        p.thickness(0.1)
+        p.arrows(X, Y, -Y/20.0, X/20.0)
+        p.newpage()
+        p.circles(X, Y, 0.5)
+        p.text(-20.0, 40.0, "page 2 (previous page)")
+        p.pagelink(-20.0, 20.0, 45.0, 38.0, 1, showborder = True)
@@ -66,6 +66,22 @@ class AClass():
     def PaperSize(self, name):
         return self.sizes[name]
 
+# document size [mm] from an AClass name ("A4")
+# or from a user size (for example "200x300")
+def papersize(Size):
+    w, h = None, None
+    # try AClass document size:
+    if Size in AClass().sizes.keys(): 
+        w, h = AClass().PaperSize(Size)
+    # parse user size
+    if "x" in Size.lower():
+        w, h = (float(s) for s in Size.split("x"))
+        # test: w, h = (float(s) for s in Size.lower.split("x"))
+    # check parsing result
+    if (w, h) == (None, None):
+        exitProcess("Document size parsing failed.")
+    return w, h
+
 # string to float rgb colour conversion
 # (give "FFFFFF", returns 1.0, 1.0, 1.0)
 def hexcolor(code):
@@ -104,6 +120,86 @@ def sca(*X):
 # elements is scaled and formatted
 # and returned as a tuple.
 
+# vectorised scale and format:
+def scas(*X, n = 4):
+    from numpy import asarray, column_stack, rint, empty, where
+    from numpy import int64, uint8
+    # interleave the arrays (x0 y0 x1 y1 ...), scale
+    # and round to integer thousandths of a point
+    V = column_stack([asarray(x, dtype = float).reshape(-1) for x in X])
+    Q = rint(V.reshape(-1)*_units*1000.0).astype(int64)
+    if len(Q) == 0: return ""
+    A = abs(Q)
+    # digits of the integer part (at least 3)
+    w = max(3, len(str(A.max()//1000)))
+    # characters: sign, digits, point, decimals, separator
+    B = empty((len(Q), w+6), dtype = uint8)
+    B[:, 0] = where(Q < 0, ord("-"), ord("+"))
+    for k in range(w+3):
+        c = w+4-k if k < 3 else w+3-k
+        B[:, c] = A//10**k%10+ord("0")
+    B[:, w+1] = ord(".")
+    # separators: "n" elements per line
+    B[:, w+5] = ord(SPC)
+    B[len(X)*n-1::len(X)*n, w+5] = ord(EOL)
+    B[-1, w+5] = ord(EOL)
+    return B.tobytes().decode("ascii")
+# note: the arrays are formatted in one
+# step, as "fix()" would do (the width
+# grows with the largest integer part)
+# "n" groups of len(X) values are put
+# on each line. The last character is
+# always an end-of-line.
+
+# regular grid detection: returns (x0, y0, sx, sy, nx) when
+# the points (x, y) are the flattened rows of a meshgrid (the
+# index k of a point gives x = x0 + (k mod nx)*sx and y = y0 +
+# (k div nx)*sy), returns None otherwise.
+def grid(x, y, tol = 1E-6):
+    from numpy import arange, allclose
+    N = len(x)
+    if N < 2: return None
+    # row length: leading points with the same y
+    nx = int((y != y[0]).argmax()) or N
+    if N % nx: return None
+    x0, y0 = x[0], y[0]
+    sx = (x[nx-1]-x0)/(nx-1) if nx > 1 else 0.0
+    sy = (y[nx]-y0) if N > nx else 0.0
+    k = arange(N)
+    if not allclose(x, x0+(k%nx)*sx, rtol = 0.0, atol = tol): return None
+    if not allclose(y, y0+(k//nx)*sy, rtol = 0.0, atol = tol): return None
+    return x0, y0, sx, sy, nx
+
+# vectorised ascii85 encoding of the bytes "b" (the groups of
+# 4 bytes are converted into 5 base-85 digits, the last group
+# is padded and truncated) as a postscript string "<~ ... ~>"
+# with lines of "w" characters.
+def a85(b, w = 76):
+    from numpy import frombuffer, empty, uint8
+    p = -len(b)%4
+    W = frombuffer(b+bytes(p), dtype = ">u4").astype("u8")
+    C = empty((len(W), 5), dtype = uint8)
+    for i in range(4, -1, -1):
+        C[:, i] = W%85+33
+        W //= 85
+    s = C.reshape(-1)[:5*len(C)-p].tobytes().decode("ascii")
+    s = EOL.join(s[i:i+w] for i in range(0, len(s), w))
+    return f"<~{s}~>"
+
+# decoding procedures of the compact encoding: "u16", "i16" and
+# "i32" convert the bytes at index k of a string into unsigned
+# or signed big endian integers. Their use is private to the
+# dictionary "pslibdict".
+COMPACT = """
+% compact data decoding (ascii85 strings)
+/pslibdict 8 dict def
+pslibdict begin
+/u16 { 2 copy get 256 mul 3 1 roll 1 add get add } bind def
+/i16 { u16 dup 32767 gt { 65536 sub } if } bind def
+/i32 { 2 copy i16 65536 mul 3 1 roll 2 add u16 add } bind def
+end
+"""
+
 # postscript document class
 class document():
 
@@ -112,48 +208,43 @@ class document():
             Path    = "p",  # default filename
             Size    = "A4", # default page size
             Type    = "ps", # ps or eps
+            Stream  = None, # or any text stream (file, pipe, ...)
+            Chunk   = 1<<16,# buffer size (characters)
+            Encoding= "text", # bulk data: "text" or "compact"
         ):
         
         # initialise page counter
         self.n = 1
         
         # setup document size
-        w, h = None, None
-        
-        # try AClass document size:
-        if Size in AClass().sizes.keys(): 
-            w, h = AClass().PaperSize(Size)
-        
-        # parse user size (for example "200x300")
-        if "x" in Size.lower():
-            w, h = (float(s) for s in Size.split("x"))
-            # test: w, h = (float(s) for s in Size.lower.split("x"))
-            
-        # check parsing result
-        if (w, h) == (None, None):
-            exitProcess("Document size parsing failed.")
+        w, h = papersize(Size)
         
         # convert  and record size in points
         # (the natural units of postscript)
         self.size = w*_units, h*_units
         
-        # get file handle
-        fh = open(f"{Path}.{Type}", 'w')
+        # get file handle (or use the stream given by the user,
+        # in which case the stream is not closed by the document)
+        fh = open(f"{Path}.{Type}", 'w') if Stream is None else Stream
         if fh is None:
             exitProcess(f"failed to open '{Path}'.")
 
         # register file handle
-        self.fh = fh
+        self.fh, self.own = fh, Stream is None
         
+        # bulk data encoding (see "data()")
+        self.encoding = Encoding
+
+        # create buffer: the lines are collected in a list which
+        # is flushed to the stream every "Chunk" characters
+        self.buffer, self.buffered, self.chunk = [], 0, Chunk
+
         # write file magic (two file types available)
         magic = {
             "eps": f"%!PS-Adobe-3.0 EPSF-3.0{EOL}",
             "ps" : f"%!PS-Adobe-3.0{EOL}",
         }
-        fh.write(magic[Type])
-        
-        # create buffer
-        self.text = ""
+        self.buffer.append(magic[Type])
         
         # get geometry
         w, h = self.size
@@ -163,13 +254,21 @@ class document():
             print(f"{w/_units:.3f} X {h/_units:.3f} Millimetres (w, h)")    
             print(f"{w/72.0:.3f} X {h/72.0:.3f} Inches (w, h)")    
 
+        # the compact encoding requires the decoding
+        # procedures and ascii85 strings (level 2)
+        if Encoding == "compact":
+            LEVEL, PROLOGUE = "%%LanguageLevel: 2", COMPACT
+        else:
+            LEVEL, PROLOGUE = "", ""
+
         # define header block
         BLOCK = f"""
         %%BoundingBox: 0 0 {w:.0f} {h:.0f}
         %%Creator:
         %%Title:
         %%CreationDate: {fulldatetime()}
-        %%Pages: 001
+        %%Pages: (atend)
+        {LEVEL}
 
         % set defaults font
         /Courier 12 selectfont
@@ -179,7 +278,7 @@ class document():
         2 copy rlineto currentpoint stroke gsave
         translate atan -1 mul rotate arrow grestore
         }} def
-
+        {PROLOGUE}
         %%Page: 1 1
 
         % --- SET ORIGIN AT PAGE CENTER ---
@@ -241,36 +340,135 @@ class document():
     # write block to buffer
     def write(self, Block):
         for l in Block[len(EOL):].split(EOL):
-            self.text += l.lstrip()+EOL
+            l = l.lstrip()+EOL
+            self.buffer.append(l)
+            self.buffered += len(l)
+        if self.buffered > self.chunk:
+            self.flush()
+        return
+
+    # write preformatted text to buffer
+    def put(self, Text):
+        self.buffer.append(Text)
+        self.buffered += len(Text)
+        if self.buffered > self.chunk:
+            self.flush()
+        return
+
+    # write arrays to buffer by chunks of "m" elements:
+    # each chunk is followed by "m {Proc} repeat", which
+    # bounds the size of the postscript operand stack.
+    # "Kinds" gives the nature of each array for the
+    # compact encoding: "v" for the components of a
+    # vector, "x" and "y" for the coordinates of points.
+    # With "Reverse", the chunks are pushed in reverse
+    # order and "Proc" pops the elements in the order
+    # of the arrays (as required by paths).
+    def data(self, Proc, *X, Kinds = None, m = 1024, Reverse = False):
+        from numpy import asarray
+        X = [asarray(x, dtype = float).reshape(-1) for x in X]
+        if self.encoding == "compact" and Kinds:
+            return self.compact(Proc, X, Kinds, m)
+        for i in range(0, len(X[0]), m):
+            if Reverse:
+                self.put(scas(*(x[i:i+m][::-1] for x in X)))
+            else:
+                self.put(scas(*(x[i:i+m] for x in X)))
+            self.put(f"{len(X[0][i:i+m])} {{{Proc}}} repeat{EOL}")
+        return
+
+    # compact encoding of the arrays (see "COMPACT"):
+    # points on a regular grid are generated by the
+    # loop index from the grid origin and steps, other
+    # points are sent as 32 bits integers (thousandths
+    # of a point) and vectors as 16 bits integers with
+    # a common scale, in ascii85 strings.
+    def compact(self, Proc, X, Kinds, m):
+        from numpy import rint
+        N = len(X[0])
+        if N == 0: return
+        # regular grid
+        G = None
+        if "x" in Kinds and "y" in Kinds:
+            G = grid(X[Kinds.index("x")], X[Kinds.index("y")])
+        # common vector scale
+        V = [abs(x).max() for x, k in zip(X, Kinds) if k == "v"]
+        s = max(V)*_units/32767 if V and max(V) > 0 else 1.0
+        for i in range(0, N, m):
+            n, STRINGS, BODY = min(m, N-i), [], []
+            for j, (x, k) in enumerate(zip(X, Kinds)):
+                x = x[i:i+m]
+                if k == "v":
+                    q = rint(x*_units/s).astype(">i2").tobytes()
+                    STRINGS.append((j, q))
+                    BODY.append(f"S{j} k 2 mul i16 {s:.9E} mul")
+                elif G is not None:
+                    x0, y0, sx, sy, nx = G
+                    if k == "x":
+                        BODY.append(f"k {i} add {nx} mod "
+                            f"{sx*_units:.9E} mul {x0*_units:.9E} add")
+                    else:
+                        BODY.append(f"k {i} add {nx} idiv "
+                            f"{sy*_units:.9E} mul {y0*_units:.9E} add")
+                else:
+                    q = rint(x*_units*1000.0).astype(">i4").tobytes()
+                    STRINGS.append((j, q))
+                    BODY.append(f"S{j} k 4 mul i32 1000 div")
+            # export the strings and the loop
+            self.put(f"pslibdict begin{EOL}")
+            for j, q in STRINGS:
+                self.put(f"/S{j} {a85(q)} def{EOL}")
+            BODY = " ".join(BODY)
+            self.put(f"0 1 {n-1} {{/k exch def {BODY} {Proc}}} for{EOL}")
+            self.put(f"end{EOL}")
+        return
+
+    # write buffer to stream
+    def flush(self):
+        self.fh.write("".join(self.buffer))
+        self.buffer, self.buffered = [], 0
         return
 
-    # the closing of the document
-    # is automatically done on
-    # deleting the class (exit):
+    # the closing of the document:
     #
-    # adjust number of pages
+    # show the last page
+    # write the number of pages in the trailer
     # flush the buffer
     # and close the file
-    def __del__(self):
-        if self.fh:
+    #
+    # use the document as a context manager
+    # ("with document() as d:") for closing it
+    # deterministically, otherwise it is closed
+    # when the class is deleted (exit).
+    def close(self):
+        if getattr(self, "fh", None):
             # show last page
             self.write(f"""
                 showpage""")
-            # update page number in header
-            self.text = self.text.replace(
-                f"%%Pages: 001",
-                f"%%Pages: {self.n:03d}")
+            # the number of pages is known at the end
+            self.write(f"""
+                %%Trailer
+                %%Pages: {self.n}
+                %%EOF""")
             # write buffer to file
-            self.fh.write(self.text)
-            # close file
-            self.fh.close()
+            self.flush()
+            # close file (if owned)
+            if self.own:
+                self.fh.close()
             # clear fh handle
             self.fh = None
         # done
         return
 
-    def close(self):
-        return self.__del__()
+    def __del__(self):
+        return self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
 
     ##################
     ### CROSS HAIR ###
@@ -477,6 +675,60 @@ class document():
         # done
         return                
 
+    # draw the points (x, y) as a single path (the field
+    # lines of "fieldlines.py" for example): the points
+    # are exported by "data()" in the order of the path.
+    def polyline(self, x, y, Closed = False):
+        from numpy import asarray
+        x = asarray(x, dtype = float).reshape(-1)
+        y = asarray(y, dtype = float).reshape(-1)
+        if len(x) < 2: return
+        # define  block
+        BLOCK = f'''
+        % --- POLYLINE ---
+        newpath
+        {sca(x[0], y[0])} moveto
+        '''
+        self.write(BLOCK)
+        # export data
+        self.data("lineto", x[1:], y[1:], Kinds = "xy", Reverse = True)
+        # done
+        return self.write(f"""
+            {"closepath " if Closed else ""}stroke""")
+
+    # draw a list of polylines [(x, y), ...]
+    def polylines(self, Lines, Closed = False):
+        for x, y in Lines:
+            self.polyline(x, y, Closed)
+        return
+
+    # draw a list of polylines [(x, y), ...] as a single path
+    # (the contours of "contours.py" for example): the points
+    # are exported together by "data()", with a flag set to
+    # zero at the first point of each polyline ("moveto").
+    def path(self, Lines):
+        from numpy import asarray, concatenate, ones
+        Lines = [(asarray(x, dtype = float).reshape(-1),
+            asarray(y, dtype = float).reshape(-1)) for x, y in Lines]
+        Lines = [(x, y) for x, y in Lines if len(x) > 1]
+        if not Lines: return
+        x = concatenate([x for x, y in Lines])
+        y = concatenate([y for x, y in Lines])
+        f = concatenate([ones(len(x)) for x, y in Lines])
+        f[concatenate(([0], [len(x) for x, y in Lines]))[:-1].cumsum()] = 0.0
+        # define  block
+        BLOCK = f'''
+        % --- PATH ---
+        newpath
+        /pathto {{ 0 eq {{ moveto }} {{ lineto }} ifelse }} def
+        '''
+        self.write(BLOCK)
+        # export data
+        self.data("pathto", x, y, f, Kinds = "xyv", Reverse = True)
+        # done
+        return self.write(f"""
+            stroke""")
+
     ###############
     ### CIRCLES ###
     ###############
@@ -493,40 +745,28 @@ class document():
         return        
 
     def circles(self, x, y, r):
-        # build data array
-        N, n, DATA = len(x), 0, ''
-        for x, y in zip(x, y):
-            n += 1
-            DATA += f"{sca(x, y)}"
-            DATA += EOL if n % 4 == 0 else SPC
         # make block
         BLOCK = f'''
         % --- MULTIPLE CIRCLES ---
         newpath
         [] 0 setdash
         /circle {{ {sca(r)} 0 360 arc stroke }} def
-        {DATA}
-        {N} {{circle}} repeat
         '''
-        return self.write(BLOCK)
+        self.write(BLOCK)
+        # export data
+        return self.data("circle", x, y, Kinds = "xy")
 
     def disks(self, x, y, r):
-        # build data array
-        N, n, DATA = len(x), 0, ''
-        for x, y in zip(x, y):
-            n += 1
-            DATA += f"{sca(x, y)}"
-            DATA += EOL if n % 4 == 0 else SPC
         # make block
         BLOCK = f'''
         % --- MULTIPLE CIRCLES ---
         newpath
         [] 0 setdash
         /circle {{ {sca(r)} 0 360 arc fill }} def
-        {DATA}
-        {N} {{circle}} repeat
         '''
-        return self.write(BLOCK)
+        self.write(BLOCK)
+        # export data
+        return self.data("circle", x, y, Kinds = "xy")
 
     ##################
     ### RECTANGLES ###
@@ -570,6 +810,8 @@ class document():
 
     def define_arrow_style(self, size = 3, ratio = 0.5):
         h, w = size, size*ratio
+        # record the arrow size (see "reduce()")
+        self.arrowsize = size
         BLOCK = f'''
         /arrow {{
         +000.000 +000.000 moveto
@@ -592,29 +834,92 @@ class document():
         # done
         return self.write(BLOCK)
 
-    def arrows(self, x, y, dx, dy):
-        # reshape arrays into 1D vectors
-        X  =  x.reshape(-1)
-        Y  =  y.reshape(-1)
-        DX = dx.reshape(-1)
-        DY = dy.reshape(-1)
-        # build data array
-        N, n, DATA = len(X), 0, ''
-        for x, y, dx, dy in zip(X, Y, DX, DY):
-            n += 1
-            DATA += f'{sca(dx)} {sca(dy)} '
-            DATA += f'{sca( x)} {sca( y)} '
-            DATA += EOL if n % 4 == 0 else SPC
+    # the options "Cull", "Cell" and "Mean" reduce
+    # the number of vectors (see "reduce()" below)
+    def arrows(self, x, y, dx, dy, Cull = False, Cell = None, Mean = False):
+        # reduce the number of vectors
+        if Cull or Cell:
+            x, y, dx, dy = self.reduce(x, y, dx, dy, Cull, Cell, Mean)
         # build block    
         BLOCK =f'''
         % --- MULTIPLE VECTORS ---
         newpath
         [] 0 setdash
-        {DATA}
-        {len(X)} {{moveto arrowto}} repeat
         '''
+        self.write(BLOCK)
+        # export data (the arrays are flattened)
+        return self.data("moveto arrowto", dx, dy, x, y, Kinds = "vvxy")
+
+    # "Cull" removes the vectors that do not reach the page
+    # (and the vectors that can not be drawn: nan, inf). The
+    # page is divided into square cells of size "Cell" [mm]
+    # and only one vector is kept per cell: the first, or the
+    # mean of all the vectors of the cell if "Mean" is set.
+    # With "Cell = True", the cell size is the arrow size:
+    # the arrows remain distinct at any output resolution.
+    def reduce(self, x, y, dx, dy, Cull = True, Cell = None, Mean = False):
+        from numpy import asarray, isfinite, floor, unique, bincount
+        from numpy import minimum, maximum, int64
+        X, Y, DX, DY = (asarray(v, dtype = float).reshape(-1)
+            for v in (x, y, dx, dy))
+        # page culling
+        if Cull:
+            k = isfinite(X) & isfinite(Y) & isfinite(DX) & isfinite(DY)
+            k &= X+minimum(DX, 0.0) <= self.RIGHT
+            k &= X+maximum(DX, 0.0) >= self.LEFT
+            k &= Y+minimum(DY, 0.0) <= self.TOP
+            k &= Y+maximum(DY, 0.0) >= self.BOTTOM
+            X, Y, DX, DY = X[k], Y[k], DX[k], DY[k]
+        # decimation
+        if Cell is True:
+            Cell = getattr(self, "arrowsize", 3.0)
+        if Cell and len(X):
+            I = floor((X-self.LEFT)/Cell).astype(int64)
+            J = floor((Y-self.BOTTOM)/Cell).astype(int64)
+            I, J = I-I.min(), J-J.min()
+            u, first, inverse = unique(I*(J.max()+1)+J,
+                return_index = True, return_inverse = True)
+            if Mean:
+                n = bincount(inverse)
+                X, Y, DX, DY = (bincount(inverse, weights = V)/n
+                    for V in (X, Y, DX, DY))
+            else:
+                first.sort()
+                X, Y, DX, DY = X[first], Y[first], DX[first], DY[first]
         # done
-        return self.write(BLOCK)
+        return X, Y, DX, DY
+
+    #############
+    ### IMAGE ###
+    #############
+
+    # draw the image "RGB" (rows x columns x 3 bytes, or rows
+    # x columns for grey levels, the first row at the bottom
+    # as in the maps of "raster.py") in the rectangle (x1, y1,
+    # x2, y2). The pixels are sent as ascii85 data, which
+    # requires a level 2 interpreter.
+    def image(self, x1, y1, x2, y2, RGB):
+        from numpy import asarray, uint8
+        RGB = asarray(RGB, dtype = uint8)
+        h, w = RGB.shape[:2]
+        n = 3 if RGB.ndim == 3 else 1
+        # define  block
+        BLOCK = f'''
+        % --- IMAGE ---
+        gsave
+        {sca(x1, y1)} translate
+        {sca(x2-x1, y2-y1)} scale
+        /Device{"RGB" if n == 3 else "Gray"} setcolorspace
+        << /ImageType 1 /Width {w} /Height {h} /BitsPerComponent 8
+        /Decode [{" ".join(n*["0 1"])}] /ImageMatrix [{w} 0 0 {h} 0 0]
+        /DataSource currentfile /ASCII85Decode filter >> image
+        '''
+        self.write(BLOCK)
+        # export data (without the string delimiter "<~")
+        self.put(a85(RGB.tobytes())[2:]+EOL)
+        # done
+        return self.write(f"""
+            grestore""")
 
     ############
     ### TEXT ###
@@ -717,9 +1022,37 @@ class document():
         # done
         return
 
+# page fragment: the drawing methods of the document write into
+# a string (without header, page or trailer), which is inserted
+# later in a document with "put()" (see "report.py"). "Page" is
+# the page number of the fragment in the document.
+class fragment(document):
+
+    def __init__(self,
+            Size    = "A4",
+            Encoding= "text",
+            Page    = 1,
+        ):
+        w, h = papersize(Size)
+        self.n, self.size = Page, (w*_units, h*_units)
+        self.fh, self.own = None, False
+        self.buffer, self.buffered, self.chunk = [], 0, 0
+        self.encoding = Encoding
+        self.LEFT, self.RIGHT  = -w/2.0, +w/2.0
+        self.TOP,  self.BOTTOM = +h/2.0, -h/2.0
+        return
+
+    # the text is kept in the buffer
+    def flush(self):
+        return
+
+    # content of the fragment
+    def getvalue(self):
+        return "".join(self.buffer)
+
 if __name__ == "__main__":
 
-    p = document(Size = "A4")
-    p.displayCrosshair()
+    with document(Size = "A4") as p:
+        p.displayCrosshair()
 
     # done
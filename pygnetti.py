@@ -12,11 +12,30 @@ from numpy import linspace
 from numpy import meshgrid
 from numpy import zeros_like
 from numpy import interp
+from numpy import abs
+from numpy import cbrt
+from numpy import sign
+from numpy import clip
+from numpy import diff
+from numpy import intp
+from numpy import minimum
+from numpy import maximum
+from numpy import nonzero
+from numpy import allclose
+from numpy import empty
+from numpy import asarray
+from numpy import unique
+from numpy import divide
+from numpy import int32
+from numpy import where
+from numpy import isnan
+from numpy import nan
 # the float type is float64 by default
 # which is equivalent to double in C
 
 # from local modules
 from ielib import file_import
+from windings import WINDINGS
 
 # here, we assume that mu_0 is 4*pi*1E-7. This simplifies the expressions used
 # for computation. One might need to change to the international definition,
@@ -34,11 +53,21 @@ from ielib import file_import
 # even and odd number of turns cannot be not too far from how a real coil looks
 # like, especially when a small diameter wire is used.
 
+# nodes of the interpolation tables (see "optimize.py"): the
+# cubic grid alpha = sign(u)(1-(1-|u|)^3), with u uniformly
+# spaced on [-1.0, +1.0], concentrates the nodes near the end
+# points. The inverse is computed in "coil.interpolate()".
+def cubicgrid(n):
+    U = linspace(-1.0, 1.0, n)
+    return sign(U)*(1.0-(1.0-abs(U))**3)
+
 class coil:
 
-    def __init__(self):
+    # the interpolation tables are read from the file "table"
+    # or given directly as a tuple of arrays (A, J1, J2)
+    def __init__(self, table = './J1J2.txt'):
         # get interpolation data 
-        data = file_import('./J1J2.txt', 2)
+        data = file_import(table, 2) if isinstance(table, str) else table
         if data is None:
             print("Optimisation tables 'J1J2.txt' not found.")
             print("Use optimise.py to build the tables.")
@@ -47,50 +76,81 @@ class coil:
             exit()
         # see "optimise.py" for more information
         # A is alpha, J1 and J2 are the normalised elliptic integrals
-        self.A, self.J1, self.J2 = data 
+        self.set_table(*data)
         # compute the square root of 32 only once (use as a constant)
         self.sqrt32 = sqrt(32)
         return
 
+    # register the interpolation tables
+    def set_table(self, A, J1, J2):
+        self.A, self.J1, self.J2 = A, J1, J2
+        # tables built on the cubic grid are interpolated
+        # without searching the nodes: the node index is
+        # computed from the change of variable
+        n = len(A)
+        self.cubic = allclose(A, cubicgrid(n), rtol = 0.0, atol = 1E-11)
+        # index scaling and slopes (used by the fast lookup)
+        self.m = (n-1)/2.0
+        self.dJ1, self.dJ2 = diff(J1), diff(J2)
+        return
+
+    # interpolate the normalised integrals J1 and J2 at the
+    # values of alpha found in A (the nodes are not searched
+    # when the table is defined on the cubic grid). An undefined
+    # alpha (NaN) gives undefined integrals, as "interp()" does.
+    def interpolate(self, A):
+        if not self.cubic:
+            J1 = interp(A, self.A, self.J1)
+            J2 = interp(A, self.A, self.J2)
+            return J1, J2
+        # change of variable: alpha = sign(u)(1-(1-|u|)^3)
+        A = clip(A, -1.0, +1.0)
+        U = (sign(A)*(1.0-cbrt(1.0-abs(A)))+1.0)*self.m
+        # node index and fraction (the index of NaN is undefined:
+        # it is clipped and the NaN is carried by the fraction)
+        I = clip(U.astype(intp), 0, len(self.dJ1)-1)
+        F = where(isnan(U), nan, U-I)
+        # linear interpolation
+        J1 = self.J1[I]+F*self.dJ1[I]
+        J2 = self.J2[I]+F*self.dJ2[I]
+        return J1, J2
+
     # "define_geometry()" is used to compute all the loop positions
+    # (compact winding, see "windings.orthocyclic()")
     def set_geometry(self,
             radius = 10.0,  # radius [mm]
             height =  1.0,  # height [mm]
             turns  =  1.0,  # number of turns on the first layer (#0)
             layers =  1.0): # number of layers (odd layers have n-1 turns)
+        self.set_winding("orthocyclic", radius, height, turns, layers)
+        return
+
+    # compute the loop positions with the winding generator "winding"
+    # (a function or the name of one of the generators found in
+    # "windings.py"), the options are passed to the generator
+    def set_winding(self, winding = "orthocyclic",
+            radius = 10.0, height = 1.0, turns = 1, layers = 1, **options):
+        f = WINDINGS[winding] if isinstance(winding, str) else winding
+        R, H, L, d = f(radius, height, turns, layers, **options)
         # record geometry
-        self.geometry = radius, height, turns, layers
-        d = height/turns    # get wire diameter [mm]
-        f = sqrt(3.0)/2.0   # compacting factor (triangular packing)
-        # loop positions:
-        rl, hl, n = [], [], 0
-        # rl is the radius list
-        # hl is the height list
-        # n is the oddness of the number of layers
-        for j in range(layers):
-            n = j%2 # determine oddness (0 even, 1 odd)
-            for i in range(turns-n):
-                r = +radius   + d/2 + j*d*f
-                h = -height/2 + d/2 + i*d   + n*d/2
-                hl.append(h)
-                rl.append(r)
-        # record positions
-        self.rl, self.hl = rl, hl
+        self.geometry = radius, height, int(round(turns)), int(round(layers))
+        self.set_loops(R, H, L, d)
+        return
+
+    # record the loop positions (arrays, used by the kernel as they are):
+    # rl is the radius array, hl is the height array, ll is the layer
+    # array (a single layer by default), "wire" is the wire diameter
+    def set_loops(self, R, H, L = None, wire = 1.0):
+        self.rl, self.hl = asarray(R, dtype = float), asarray(H, dtype = float)
+        self.ll = zeros_like(self.rl, dtype = int32) if L is None else asarray(L)
+        self.wire = wire
         return
 
     # draw the coil wire positions (calculated above)
     def draw_wires(self, psdoc):
-        # get geometry
-        radius, height, turns, layers = self.geometry
-        d = height/turns    # get wire diameter
-        f = sqrt(3.0)/2.0   # compacting factor
-        # get more geometry
-        from numpy import array
-        # the sign operator works only on numpy arrays
-        rl, hl = array(self.rl), array(self.hl)        
         # loop cross sections
-        psdoc.circles(+rl, hl, d/2)
-        psdoc.circles(-rl, hl, d/2)
+        psdoc.circles(+self.rl, self.hl, self.wire/2)
+        psdoc.circles(-self.rl, self.hl, self.wire/2)
         # done
         return        
 
@@ -131,36 +191,135 @@ class coil:
         psdoc.disks(X, Z, 0.1)
         return
 
-    # add the field produced by one loop at the grid points. 
-    def add_loop(self,
+    # compute the field produced by one loop at the points (X, Z)
+    def loop_field(self,
             r,  # loop radius [mm]
-            h): # loop height [mm]
+            h,  # loop height [mm]
+            X,  # points x [mm]
+            Z): # points z [mm]
         # shift loop's height
-        ZH = self.Z-h
+        ZH = Z-h
         # intermediate vector
-        D2 = square(self.X)+square(ZH)+square(r)
+        D2 = square(X)+square(ZH)+square(r)
         # alpha vector
-        A = 2*r*self.X/D2
+        A = 2*r*X/D2
         # interpolate J1, J2
-        J1 = interp(A, self.A, self.J1)
-        J2 = interp(A, self.A, self.J2)
+        J1, J2 = self.interpolate(A)
         # calculate I1, I2
         T81A = self.sqrt32/(1.0-A)/(1.0+A)
         I1, I2 = T81A*J1, T81A*J2
         # calculate fields
         R1D3 = r/sqrt(D2*D2*D2)
         BX = ZH*R1D3*I1
-        BZ = R1D3*(r*I2-self.X*I1)
+        BZ = R1D3*(r*I2-X*I1)
+        # done
+        return BX/10.0, BZ/10.0 # [mT]
+
+    # add the field produced by one loop at the grid points. 
+    def add_loop(self,
+            r,  # loop radius [mm]
+            h): # loop height [mm]
+        BX, BZ = self.loop_field(r, h, self.X, self.Z)
         # add loop contribution to the total field
-        self.BX += BX/10.0 # [mT]
-        self.BZ += BZ/10.0 # [mT]
+        self.BX += BX
+        self.BZ += BZ
         # done
         return
 
+    # compute the coil field at the points (X, Z) [mm], the
+    # arrays can be of any shape (the grid is not used). The
+    # loops are taken by chunks of (loops x points) pairs.
+    def field(self, X, Z, chunk = 1<<14):
+        X, Z = asarray(X, dtype = float), asarray(Z, dtype = float)
+        x, z = X.reshape(-1), Z.reshape(-1)
+        BX, BZ = zeros_like(x), zeros_like(z)
+        m = max(1, chunk//max(len(x), 1))
+        for k in range(0, len(self.rl), m):
+            bx, bz = self.loop_field(self.rl[k:k+m, None], self.hl[k:k+m, None], x, z)
+            BX += bx.sum(0)
+            BZ += bz.sum(0)
+        return BX.reshape(X.shape), BZ.reshape(Z.shape)
+
+    # response matrices: the fields of the loops for a current of
+    # 1A at the points (X, Z) (the grid by default). GX and GZ have
+    # the shape (points x loops). "loops" selects the loops (a layer
+    # for example, see "groups()"). The field of the currents I (one
+    # per loop) is GX @ I, GZ @ I, and the field of many current
+    # distributions (loops x distributions) is a matrix product.
+    def response(self, X = None, Z = None, loops = None):
+        if X is None: X, Z = self.X, self.Z
+        X, Z = X.reshape(-1), Z.reshape(-1)
+        if loops is None: loops = range(len(self.rl))
+        GX, GZ = empty((len(X), len(loops))), empty((len(X), len(loops)))
+        for k, i in enumerate(loops):
+            GX[:, k], GZ[:, k] = self.loop_field(self.rl[i], self.hl[i], X, Z)
+        return GX, GZ
+
+    # indices of the loops of each layer
+    def groups(self):
+        G = {}
+        for i, j in enumerate(self.ll):
+            G.setdefault(j, []).append(i)
+        return list(G.values())
+
+    # field of the currents I (one per loop, or loops x distributions)
+    # at the points (X, Z) (the grid by default). The response matrices
+    # are assembled for one group of loops at a time (the layers by
+    # default) which bounds the memory. Returns BX and BZ with the
+    # shape of X (followed by the number of distributions).
+    def currents_field(self, I, X = None, Z = None, groups = None):
+        if X is None: X, Z = self.X, self.Z
+        I = asarray(I, dtype = float)
+        if groups is None: groups = self.groups()
+        BX, BZ = 0.0, 0.0
+        for g in groups:
+            GX, GZ = self.response(X, Z, g)
+            BX, BZ = BX+GX @ I[g], BZ+GZ @ I[g]
+        return BX.reshape(X.shape+I.shape[1:]), BZ.reshape(Z.shape+I.shape[1:])
+
+    # field on the 3D grid of axes x, y and z [mm]: BX, BY and BZ
+    # have the shape (z, y, x). The field depends only on (rho, z):
+    # it is computed once in the half plane (rho, z) and the volume
+    # is filled by projection of the radial component onto x and y.
+    # By default, the distinct values of rho found in the grid are
+    # used. With "nrho" given, the rho axis is sampled uniformly with
+    # "nrho" points (at least 2) and the fields are interpolated
+    # linearly: the relative error is about (step/d)^2/8 at the
+    # distance d from the wires. Within "near" steps of the box of the
+    # windings (error above 1E-3 for near = 10) the interpolation is not
+    # used and the field is computed at the exact rho of the points.
+    def volume_field(self, x, y, z, nrho = None, near = 10.0):
+        x, y, z = (asarray(v, dtype = float) for v in (x, y, z))
+        X, Y = meshgrid(x, y)
+        RHO = sqrt(X*X+Y*Y)
+        if nrho is None:
+            rho, i = unique(RHO, return_inverse = True)
+            BR, BZ = self.field(*meshgrid(rho, z))
+            BR, BZ = BR[:, i.reshape(RHO.shape)], BZ[:, i.reshape(RHO.shape)]
+        else:
+            rho = linspace(0.0, RHO.max(), nrho)
+            BR, BZ = self.field(*meshgrid(rho, z))
+            U = RHO/(rho[1]-rho[0])
+            i = minimum(U.astype(intp), nrho-2)
+            F = U-i
+            BR = BR[:, i]*(1.0-F)+BR[:, i+1]*F
+            BZ = BZ[:, i]*(1.0-F)+BZ[:, i+1]*F
+            # points near the windings
+            w, d = self.wire/2, near*(rho[1]-rho[0])
+            DR = maximum(maximum(self.rl.min()-w-RHO, RHO-self.rl.max()-w), 0.0)
+            DZ = maximum(maximum(self.hl.min()-w-z, z-self.hl.max()-w), 0.0)
+            k, j, i = nonzero(DR[None, :, :]**2+DZ[:, None, None]**2 < d*d)
+            if len(k): BR[k, j, i], BZ[k, j, i] = self.field(RHO[j, i], z[k])
+        # projection (the radial component vanishes on the axis)
+        C, S = divide(X, RHO, out = zeros_like(X), where = RHO > 0.0), \
+               divide(Y, RHO, out = zeros_like(Y), where = RHO > 0.0)
+        return BR*C, BR*S, BZ
+
     # compute coil field produced at the grid points.
     def computeCoil(self):
-        for h, r in zip(self.hl, self.rl):
-            self.add_loop(r, h)
+        BX, BZ = self.field(self.X, self.Z)
+        self.BX += BX
+        self.BZ += BZ
         return
 
     def set_orign(self, x, y, z, u, v):
@@ -291,3 +450,6 @@ if __name__ == "__main__":
     # bx, bz = c.BX[0, 10], c.BZ[0, 10]
     # print(f"center field = {sqrt(bx*bx+bz*bz)*1E3:.3f}µT")
     # print(f"center field = {sqrt(bx*bx+bz*bz)*1E0:.3f}mT")
+
+    # done
+    d.close()
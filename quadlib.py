@@ -0,0 +1,158 @@
+#!/usr/bin/python3
+# file: quadlib.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: adaptive quadrature library
+# repository: https://github.com/RochSchanen/pygnetti
+
+# from "https://numpy.org/"
+from numpy import pi
+from numpy import sin
+from numpy import sqrt
+from numpy import sign
+from numpy import abs
+from numpy import array
+from numpy import arange
+from numpy import full
+from numpy import zeros
+from numpy import zeros_like
+from numpy import asarray
+from numpy import maximum
+from numpy import concatenate
+from numpy import add
+from numpy import finfo
+
+################################################## GAUSS-KRONROD
+
+# Kronrod nodes (positive half) and weights on [-1.0, +1.0]
+_xk = [
+    0.991455371120812639206854697526329,
+    0.949107912342758524526189684047851,
+    0.864864423359769072789712788640926,
+    0.741531185599394439863864773280788,
+    0.586087235467691130294144845693013,
+    0.405845151377397166906606412076961,
+    0.207784955007898467600689403773245,
+    0.000000000000000000000000000000000]
+
+_wk = [
+    0.022935322010529224963732008058970,
+    0.063092092629978553290700663189204,
+    0.104790010322250183839876322541518,
+    0.140653259715525918745189590510238,
+    0.169004726639267902826583426598550,
+    0.190350578064785409913256402421014,
+    0.204432940075298892414161999234649,
+    0.209482141084727828012999174891714]
+
+# Gauss weights (the Gauss nodes are every other Kronrod node)
+_wg = [
+    0.129484966168869693270611432679082,
+    0.279705391489276667901467771423780,
+    0.381830050505118944950369775488975,
+    0.417959183673469387755102040816327]
+
+# full 15 points rule, the 7 Gauss nodes are found at [1::2]
+XK = array([-x for x in _xk[:-1]] + _xk[::-1])
+WK = array(_wk[:-1] + _wk[::-1])
+WG = array(_wg[:-1] + _wg[::-1])
+
+# machine precision
+EPS = finfo(float).eps
+
+# adaptive Gauss-Kronrod quadrature (G7, K15) of many integrals
+# at once: "f(P, T)" returns a tuple of integrands evaluated at
+# the parameters P and the abscissas T. One integral is computed
+# on [a, b] for each parameter and each integrand. The intervals
+# of all the parameters are processed together and each pass is
+# a single call to "f". An interval is accepted when the Kronrod
+# Gauss difference is smaller than its share of "tol" (which is
+# proportional to its width), otherwise it is bisected. The sum
+# of the differences is the error estimate of each integral.
+def gausskronrod(f, P, a, b, tol = 1E-12, passes = 60):
+    P = asarray(P, dtype = float).reshape(-1)
+    n = len(P)
+    # parameter index, lower and upper bounds of the intervals
+    K, L, U = arange(n), full(n, float(a)), full(n, float(b))
+    R, E, N = None, None, zeros(n, dtype = int)
+    for p in range(passes):
+        if len(K) == 0: break
+        # interval centres and half widths
+        C, H = (U+L)/2, (U-L)/2
+        T = C[:, None]+H[:, None]*XK[None, :]
+        F = f(P[K][:, None], T)
+        if R is None:
+            R = [zeros(n) for i in F]
+            E = [zeros(n) for i in F]
+        add.at(N, K, len(XK))
+        # Kronrod and Gauss estimates
+        k = [(Fi @ WK)*H for Fi in F]
+        g = [(Fi[:, 1::2] @ WG)*H for Fi in F]
+        d = [abs(ki-gi) for ki, gi in zip(k, g)]
+        # accept the intervals within tolerance (or
+        # limited by round-off errors, or last pass)
+        ok = full(len(K), True)
+        for ki, di in zip(k, d):
+            ok &= di <= maximum(tol*2*H/(b-a), 50*EPS*abs(ki))
+        if p == passes-1: ok[:] = True
+        for Ri, Ei, ki, di in zip(R, E, k, d):
+            add.at(Ri, K[ok], ki[ok])
+            add.at(Ei, K[ok], di[ok])
+        # bisect the other intervals
+        r = ~ok
+        K = concatenate((K[r], K[r]))
+        L, U = concatenate((L[r], C[r])), concatenate((C[r], U[r]))
+    # integrals, error estimates, number of evaluations
+    return R, E, N
+
+################################################## J1 and J2
+
+# normalised integrands of J1 and J2 (see optimize.py) for
+# alpha in [0, 1), on [0, pi] (the factor 2 accounts for the
+# symmetry t -> -t). m = 1-alpha*cos(t) is computed without
+# cancellation near its minimum (t = 0).
+def _integrandsJ1J2(A, T):
+    s = sin(T/2)
+    s2 = s*s
+    m = (1.0-A)+2.0*A*s2
+    g = 2.0*(1.0-A)*(1.0+A)/sqrt(32)/(m*sqrt(m))
+    return (1.0-2.0*s2)*g, g
+
+# normalised elliptic integrals J1 and J2 at the values of
+# alpha found in A, with the error estimates and the number
+# of integrand evaluations. J1 is odd, J2 is even: the sharp
+# peak of the integrand (at t = 0 or t = pi) is always moved
+# to t = 0. The limits at -1.0 and +1.0 are exact.
+def computeJ1J2(A, tol = 1E-12):
+    A = asarray(A, dtype = float)
+    S, B = sign(A), abs(A)
+    # limits: (J1, J2) = (sign(alpha), 1.0)
+    J1, J2 = S.copy(), zeros_like(A)+1.0
+    E1, E2 = zeros_like(A), zeros_like(A)
+    N = zeros(A.shape, dtype = int)
+    # inner points
+    i = B < 1.0
+    if i.any():
+        (j1, j2), (e1, e2), n = gausskronrod(
+            _integrandsJ1J2, B[i], 0.0, pi, tol)
+        J1[i], J2[i] = S[i]*j1, j2
+        E1[i], E2[i] = e1, e2
+        N[i] = n
+    return J1, J2, E1, E2, N
+
+################################################## ELLIPTIC INTEGRALS
+
+# complete elliptic integrals of the first and second kind K(m)
+# and E(m), with the parameter m = k^2 in [0, 1), computed by the
+# arithmetic-geometric mean (the convergence is quadratic).
+def ellipke(M, passes = 40):
+    M = asarray(M, dtype = float)
+    a, b, c = zeros_like(M)+1.0, sqrt(1.0-M), sqrt(M)
+    s, p = M/2.0, 0.5
+    for i in range(passes):
+        a, b, c = (a+b)/2.0, sqrt(a*b), (a-b)/2.0
+        p *= 2.0
+        s = s+p*c*c
+        if (abs(c) <= EPS*abs(a)).all(): break
+    K = pi/2.0/a
+    return K, K*(1.0-s)
@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+# file: raster.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: raster images of the field maps (png)
+# repository: https://github.com/RochSchanen/pygnetti
+
+# The maps computed on the grids of "pygnetti.py" (|B|, BZ, the
+# homogeneity, ...) are converted into images through a colour
+# table: one pixel per grid point. The images are written as png
+# files with the standard library only (zlib and struct), or are
+# embedded in a postscript page ("document.image()" in pslib.py).
+# The rows of the images follow the grid: the first row is at the
+# bottom (z minimum).
+
+# from "https://numpy.org/"
+from numpy import array
+from numpy import asarray
+from numpy import linspace
+from numpy import interp
+from numpy import empty
+from numpy import zeros
+from numpy import rint
+from numpy import clip
+from numpy import isfinite
+from numpy import nanmin
+from numpy import nanmax
+from numpy import uint8
+
+# from the standard library
+from zlib import compress, crc32
+from struct import pack
+
+# from local module "contours.py"
+from contours import magnitude, homogeneity
+
+################################################## COLOURS
+
+# colour maps: equally spaced control points (r, g, b)
+COLORMAPS = {
+    "gray": [
+        (0.0, 0.0, 0.0),
+        (1.0, 1.0, 1.0)],
+    "viridis": [
+        (0.267, 0.005, 0.329),
+        (0.279, 0.175, 0.483),
+        (0.230, 0.322, 0.546),
+        (0.173, 0.449, 0.558),
+        (0.128, 0.567, 0.551),
+        (0.158, 0.684, 0.502),
+        (0.369, 0.789, 0.383),
+        (0.678, 0.864, 0.190),
+        (0.993, 0.906, 0.144)],
+    "inferno": [
+        (0.001, 0.000, 0.014),
+        (0.129, 0.047, 0.291),
+        (0.342, 0.062, 0.429),
+        (0.541, 0.135, 0.415),
+        (0.736, 0.216, 0.330),
+        (0.894, 0.353, 0.194),
+        (0.978, 0.558, 0.035),
+        (0.975, 0.798, 0.206),
+        (0.988, 0.998, 0.645)],
+    # diverging (for the homogeneity)
+    "coolwarm": [
+        (0.230, 0.299, 0.754),
+        (0.384, 0.510, 0.918),
+        (0.554, 0.690, 0.996),
+        (0.724, 0.815, 0.976),
+        (0.867, 0.864, 0.863),
+        (0.960, 0.767, 0.674),
+        (0.957, 0.598, 0.477),
+        (0.865, 0.371, 0.296),
+        (0.706, 0.016, 0.150)],
+    }
+
+# colour table of n entries (n x 3 bytes) of the colour map "name"
+def colortable(name = "viridis", n = 256):
+    P = array(COLORMAPS[name])
+    x, t = linspace(0.0, 1.0, len(P)), linspace(0.0, 1.0, n)
+    T = empty((n, 3), dtype = uint8)
+    for i in range(3):
+        T[:, i] = rint(interp(t, x, P[:, i])*255.0)
+    return T
+
+# convert the map F into an image (rows x columns x 3 bytes): the
+# values between vmin and vmax (the extrema of F by default) span
+# the colour map, the other values are clipped. The undefined
+# values (nan, on the wires for example) are given the colour
+# "bad".
+def colorize(F, vmin = None, vmax = None, cmap = "viridis",
+        bad = (255, 255, 255)):
+    F = asarray(F, dtype = float)
+    if vmin is None: vmin = nanmin(F)
+    if vmax is None: vmax = nanmax(F)
+    T = colortable(cmap)
+    n = len(T)-1
+    ok = isfinite(F)
+    I = zeros(F.shape, dtype = int)
+    s = n/(vmax-vmin) if vmax > vmin else 0.0
+    I[ok] = rint(clip((F[ok]-vmin)*s, 0, n))
+    RGB = T[I]
+    RGB[~ok] = bad
+    return RGB
+
+# image of the coil grid maps: "B" (magnitude), "BX", "BZ", or
+# "ppm" (homogeneity of the magnitude, relative to the value at
+# the grid point nearest the origin)
+def fieldimage(c, Map = "B", vmin = None, vmax = None, cmap = "viridis"):
+    if Map == "BX": F = c.BX
+    elif Map == "BZ": F = c.BZ
+    else: F = magnitude(c.BX, c.BZ)
+    if Map == "ppm":
+        i = (c.X**2+c.Z**2).argmin()
+        F = homogeneity(F, F.reshape(-1)[i])
+    return colorize(F, vmin, vmax, cmap)
+
+################################################## PNG
+
+# png chunk: length, type, data, crc
+def _chunk(kind, data):
+    return pack(">I", len(data))+kind+data+pack(">I", crc32(kind+data))
+
+# write the image "RGB" (rows x columns x 3 bytes, or rows x
+# columns for grey levels) to the png file "path". The first row
+# of the image is at the bottom: the rows are written in reverse
+# order (png images start from the top).
+def writepng(path, RGB, level = 6):
+    RGB = asarray(RGB, dtype = uint8)
+    h, w = RGB.shape[:2]
+    n = 3 if RGB.ndim == 3 else 1
+    # every row starts with a filter byte (0: none)
+    D = zeros((h, 1+w*n), dtype = uint8)
+    D[:, 1:] = RGB[::-1].reshape(h, w*n)
+    # 8 bits per sample, colour type 2 (rgb) or 0 (grey)
+    head = pack(">IIBBBBB", w, h, 8, 2 if n == 3 else 0, 0, 0, 0)
+    with open(path, "wb") as fh:
+        fh.write(b"\x89PNG\r\n\x1a\n")
+        fh.write(_chunk(b"IHDR", head))
+        fh.write(_chunk(b"IDAT", compress(D.tobytes(), level)))
+        fh.write(_chunk(b"IEND", b""))
+    return
+
+if __name__ == "__main__":
+
+    from pygnetti import coil
+    from pslib import document
+
+    # coil of the "pygnetti.py" demonstration
+    c = coil()
+    c.set_geometry(radius = 15, height = 5.0, turns = 5, layers = 10)
+    c.set_grid(-40.0, 40.0, 801, -40.0, 40.0, 801)
+    c.computeCoil()
+
+    # field magnitude and homogeneity (+/- 1%)
+    B = fieldimage(c, "B", cmap = "inferno")
+    H = fieldimage(c, "ppm", -1E4, +1E4, cmap = "coolwarm")
+    writepng("field.png", B)
+    writepng("homogeneity.png", H)
+
+    # embedded in a postscript page
+    with document(Path = "raster", Size = "A5", Type = "eps") as d:
+        d.image(-40.0, -40.0, +40.0, +40.0, H)
+        d.rgbcolor(0.0, 0.0, 0.0)
+        d.thickness(0.01)
+        c.draw_wires(d)
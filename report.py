@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+# file: report.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: multi-page reports rendered in parallel
+# repository: https://github.com/RochSchanen/pygnetti
+
+# A report is a list of pages: each page is computed and drawn by a
+# function "f(d, *args)" where "d" is a page fragment (see pslib.py)
+# that has the drawing interface of the document. The pages are
+# rendered concurrently by worker processes, and the fragments are
+# inserted in order into the document by the calling process which
+# is the only writer: the pages are numbered by the document, and
+# the page links ("pagelink()") refer to the position of the pages
+# in the report. The page functions and their arguments are sent to
+# the workers: they must be defined at the top level of a module.
+# The fragments are postscript: the document is a pslib document.
+
+# from the standard library
+from os import cpu_count
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# from local module "pslib.py"
+from pslib import fragment, _units
+
+# render one page (in a worker process)
+def _render(f, args, Size, Encoding, Page):
+    d = fragment(Size, Encoding, Page)
+    f(d, *args)
+    return d.getvalue()
+
+# render the pages [(f, args), ...] and write them in order into
+# the document "d": the first page is drawn on the current page of
+# the document, the others on new pages. At most 2 pages per worker
+# are waiting to be written. With "workers = 0", the pages are
+# rendered in the calling process.
+def render(d, Pages, workers = None):
+    w, h = d.size
+    Size, n = f"{w/_units!r}x{h/_units!r}", d.n
+    # write one page
+    def write(k, Text):
+        if k: d.newpage()
+        d.put(Text)
+        return
+    if workers == 0:
+        for k, (f, args) in enumerate(Pages):
+            write(k, _render(f, args, Size, d.encoding, n+k))
+        return
+    workers = workers or cpu_count()
+    with ProcessPoolExecutor(workers) as X:
+        Q, k = deque(), 0
+        for i, (f, args) in enumerate(Pages):
+            Q.append(X.submit(_render, f, args, Size, d.encoding, n+i))
+            if len(Q) >= 2*workers:
+                write(k, Q.popleft().result())
+                k += 1
+        while Q:
+            write(k, Q.popleft().result())
+            k += 1
+    return
+
+################################################## DEMO
+
+# one page of the demonstration: field lines of a coil design with
+# links to the previous and the next pages
+def coilpage(d, n, turns, layers):
+    from pygnetti import coil
+    from fieldlines import tracelines
+    c = coil()
+    c.set_geometry(radius = 15, height = turns*1.0, turns = turns,
+        layers = layers)
+    X0 = [1.0, 3.0, 5.0, 7.0, 9.0, 11.0, 13.0]
+    Lines, Closed = tracelines(c, X0, [0.0]*len(X0),
+        length = 500.0, box = (-60.0, 60.0, -80.0, 80.0))
+    d.text(d.LEFT+10.0, d.TOP-15.0,
+        f"page {d.n}/{n}: {turns} turns, {layers} layers")
+    if d.n > 1:
+        d.text(d.LEFT+10.0, d.BOTTOM+10.0, "previous")
+        d.pagelink(d.LEFT+10.0, d.LEFT+40.0, d.BOTTOM+15.0,
+            d.BOTTOM+8.0, d.n-1)
+    if d.n < n:
+        d.text(d.RIGHT-30.0, d.BOTTOM+10.0, "next")
+        d.pagelink(d.RIGHT-30.0, d.RIGHT-10.0, d.BOTTOM+15.0,
+            d.BOTTOM+8.0, d.n+1)
+    d.rgbcolor(0.8, 0.1, 0.3)
+    d.thickness(0.01)
+    c.draw_wires(d)
+    d.rgbcolor(0.1, 0.3, 0.9)
+    d.thickness(0.1)
+    d.polylines(Lines)
+    d.polylines([(-x, z) for x, z in Lines])
+    return
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+    from pslib import document
+
+    parser = ArgumentParser(description = "coil designs report")
+    parser.add_argument("--workers", type = int, default = None,
+        help = "number of worker processes (0: none)")
+    args = parser.parse_args()
+
+    designs = [(t, l) for t in (3, 5, 9) for l in (2, 6, 10)]
+    Pages = [(coilpage, (len(designs), t, l)) for t, l in designs]
+    with document(Path = "report", Size = "A5") as d:
+        render(d, Pages, args.workers)
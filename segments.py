@@ -0,0 +1,199 @@
+#!/usr/bin/python3
+# file: segments.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: Biot-Savart field of arbitrary wire paths
+# repository: https://github.com/RochSchanen/pygnetti
+
+# The conductors are polylines in space (helices with pitch, leads,
+# saddle coils, racetracks, ...). The field of each straight segment
+# is given in closed form: for a segment from a to b carrying the
+# current I, at the point p, with r1 = p-a and r2 = p-b,
+#
+#   B = mu_0 I/4/pi (r1 x r2)(|r1|+|r2|)/(|r1||r2|(|r1||r2|+r1.r2))
+#
+# (the field vanishes on the line of the segment). The sum over the
+# segments is vectorised over (segments x points) by chunks of a
+# bounded size. The units are the same as in "pygnetti.py": mm, mT,
+# and the currents are given in A.
+
+# from "https://numpy.org/"
+from numpy import pi
+from numpy import sin
+from numpy import cos
+from numpy import sqrt
+from numpy import array
+from numpy import asarray
+from numpy import linspace
+from numpy import zeros
+from numpy import zeros_like
+from numpy import full
+from numpy import meshgrid
+from numpy import broadcast_arrays
+from numpy import concatenate
+from numpy import column_stack
+from numpy import where
+from numpy import errstate
+
+################################################## PATHS
+
+# all the paths are arrays of points (n x 3) [mm], the closed paths
+# end with their first point.
+
+# helix of radius r along Oz from z0 with the "pitch" [mm/turn]:
+# n segments per turn
+def helix(r, pitch, turns, z0 = 0.0, n = 64):
+    t = linspace(0.0, 2.0*pi*turns, int(n*turns)+1)
+    return column_stack((r*cos(t), r*sin(t), z0+pitch*t/2.0/pi))
+
+# closed loop of radius r in the plane z = h (n segments)
+def loop(r, h = 0.0, n = 64):
+    t = linspace(0.0, 2.0*pi, n+1)
+    return column_stack((r*cos(t), r*sin(t), full(n+1, float(h))))
+
+# closed racetrack in the plane z = h: two straight sections of
+# length "l" along Oy, at x = -r and x = +r, joined by half
+# circles of radius r (n segments each)
+def racetrack(r, l, h = 0.0, n = 32):
+    t = linspace(0.0, pi, n+1)
+    R = column_stack((r*cos(t), l/2.0+r*sin(t)))
+    L = column_stack((-r*cos(t), -l/2.0-r*sin(t)))
+    P = concatenate((R, L, R[:1]))
+    return column_stack((P, full(len(P), float(h))))
+
+# closed saddle coil on the cylinder of radius r along Oz: two arcs
+# of angle "phi" at z = -l/2 and z = +l/2 joined by straight sections
+# ("a" is the angle of the centre of the saddle: the transverse coil
+# is the saddle at a = 0 and the saddle at a = pi with the opposite
+# current)
+def saddle(r, phi, l, a = 0.0, n = 32):
+    t = linspace(a-phi/2.0, a+phi/2.0, n+1)
+    lower = column_stack((r*cos(t), r*sin(t), full(n+1, -l/2.0)))
+    upper = column_stack((r*cos(t[::-1]), r*sin(t[::-1]), full(n+1, +l/2.0)))
+    return concatenate((lower, upper, lower[:1]))
+
+# straight lead from the point a to the point b
+def lead(a, b):
+    return array([a, b], dtype = float)
+
+################################################## CONDUCTOR
+
+# a conductor is a set of paths with their currents: it is not a
+# coil of loops (no tables are required), but it has the grid
+# interface of "coil" (set_grid(), computeCoil(), field(),
+# draw_wires()) and is used in its place for the maps, the fields
+# being computed by the segments formula above
+class conductor:
+
+    def __init__(self, *paths, current = 1.0):
+        self.paths = []
+        self.A, self.B, self.I = zeros((0, 3)), zeros((0, 3)), zeros(0)
+        for P in paths:
+            self.add_path(P, current)
+        return
+
+    # add the segments of the path P (n x 3) with the current [A]
+    def add_path(self, P, current = 1.0):
+        P = asarray(P, dtype = float)
+        self.paths.append(P)
+        self.A = concatenate((self.A, P[:-1]))
+        self.B = concatenate((self.B, P[1:]))
+        self.I = concatenate((self.I, full(len(P)-1, float(current))))
+        return
+
+    # field of the segments at the points (X, Y, Z) [mm]: the arrays
+    # can be of any shape. At most "chunk" (points x segments) pairs
+    # are computed at once.
+    def field3(self, X, Y, Z, chunk = 1<<18):
+        X, Y, Z = broadcast_arrays(*(asarray(V, dtype = float) for V in (X, Y, Z)))
+        shape = X.shape
+        P = [V.reshape(-1)[:, None] for V in (X, Y, Z)]
+        F = [zeros(X.size), zeros(X.size), zeros(X.size)]
+        ns = len(self.A)
+        m = max(1, chunk//max(ns, 1))
+        s = max(1, min(ns, chunk))
+        for j in range(0, ns, s):
+            a, b, I = self.A[j:j+s].T, self.B[j:j+s].T, self.I[j:j+s]
+            for i in range(0, X.size, m):
+                x1, y1, z1 = (P[k][i:i+m]-a[k] for k in range(3))
+                x2, y2, z2 = (P[k][i:i+m]-b[k] for k in range(3))
+                d1 = sqrt(x1*x1+y1*y1+z1*z1)
+                d2 = sqrt(x2*x2+y2*y2+z2*z2)
+                D = d1*d2
+                D *= D+x1*x2+y1*y2+z1*z2
+                # the field vanishes on the line of the segment
+                with errstate(divide = "ignore", invalid = "ignore"):
+                    f = where(D > 0.0, I*(d1+d2)/D, 0.0)
+                F[0][i:i+m] += ((y1*z2-z1*y2)*f).sum(-1)
+                F[1][i:i+m] += ((z1*x2-x1*z2)*f).sum(-1)
+                F[2][i:i+m] += ((x1*y2-y1*x2)*f).sum(-1)
+        # mu_0/4/pi = 1E-7, lengths in mm, field in mT
+        return tuple(V.reshape(shape)/10.0 for V in F)
+
+    # field at the points (X, Z) of the plane xOz
+    def field(self, X, Z):
+        BX, BY, BZ = self.field3(X, 0.0, Z)
+        return BX, BZ
+
+    # field on the 3D grid of axes x, y and z [mm] (shape (z, y, x)):
+    # there is no symmetry, the field is computed at every point
+    def volume_field(self, x, y, z, nrho = None):
+        return self.field3(*meshgrid(z, y, x, indexing = "ij")[::-1])
+
+    # draw the paths projected onto the plane xOz
+    def draw_wires(self, psdoc):
+        psdoc.polylines([(P[:, 0], P[:, 2]) for P in self.paths])
+        return
+
+    # grid of the plane xOz (see "coil.set_grid()"): the component
+    # BY of the field is recorded as well (it does not vanish in
+    # general)
+    def set_grid(self, xs, xe, xn, zs, ze, zn):
+        self.X, self.Z = meshgrid(linspace(xs, xe, xn), linspace(zs, ze, zn))
+        self.BX = zeros_like(self.X)
+        self.BY = zeros_like(self.X)
+        self.BZ = zeros_like(self.Z)
+        return
+
+    # compute the field at the grid points
+    def computeCoil(self):
+        BX, BY, BZ = self.field3(self.X, 0.0, self.Z)
+        self.BX += BX
+        self.BY += BY
+        self.BZ += BZ
+        return
+
+if __name__ == "__main__":
+
+    from time import perf_counter
+    from pygnetti import coil
+
+    # a polygonal loop compared to the elliptic kernel
+    c = coil()
+    X = linspace(0.0, 20.0, 201)
+    Z = full(201, 3.0)
+    RX, RZ = c.loop_field(10.0, 0.0, X, Z)
+    w = conductor(loop(10.0, 0.0, 4096))
+    t = perf_counter()
+    BX, BZ = w.field(X, Z)
+    t = perf_counter()-t
+    E = sqrt((BX-RX)**2+(BZ-RZ)**2)/sqrt(RX**2+RZ**2)
+    print(f"4096 segments loop: max relative error {E.max():.1E} "
+        f"({t/len(X)/4096*1E9:.1f}ns per segment and point)")
+
+    # helix with leads on a grid
+    H = helix(10.0, 1.0, 20, z0 = -10.0)
+    w = conductor(H,
+        lead(H[0], H[0]+[0.0, 0.0, -20.0]),
+        lead(H[-1], H[-1]+[0.0, 0.0, +20.0]))
+    w.set_grid(-8.0, 8.0, 33, -8.0, 8.0, 33)
+    w.computeCoil()
+    print(f"helix: central field {w.BZ[16, 16]:.4f}mT "
+        f"(BX {w.BX[16, 16]:.2E}mT, BY {w.BY[16, 16]:.2E}mT)")
+
+    # transverse (saddle) coil with 120 degrees arcs
+    w = conductor(saddle(10.0, 2.0*pi/3.0, 40.0))
+    w.add_path(saddle(10.0, 2.0*pi/3.0, 40.0, a = pi), -1.0)
+    BX, BY, BZ = w.field3(array([0.0, 2.0]), 0.0, 0.0)
+    print(f"saddle: central field {BX[0]:.4f}mT, "
+        f"{1E6*(BX[1]-BX[0])/BX[0]:.0f}ppm at x = 2mm")
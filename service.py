@@ -0,0 +1,252 @@
+#!/usr/bin/python3
+# file: service.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: local field evaluation service
+# repository: https://github.com/RochSchanen/pygnetti
+
+# A long running process keeps the interpolation tables and the coils
+# in memory and answers the field queries of the analysis scripts
+# over HTTP on the local host (JSON bodies):
+#
+# GET  /coils   the coils and their geometries
+# GET  /stats   the number of requests and of kernel calls per coil
+# POST /coil    {"name": ..., "radius": ..., "height": ...,
+#               "turns": ..., "layers": ...} defines (or redefines)
+#               a coil (see "coil.set_geometry()")
+# POST /field   {"coil": ..., "x": [...], "z": [...]} returns
+#               {"bx": [...], "bz": [...]} [mm, mT]
+#
+# Each coil has a batcher: the queries received during a short window
+# ("window" seconds after the first query of a batch) are evaluated by
+# one call of "coil.field()" on all their points, and the results are
+# split between the queries. The requests are served by threads. The
+# errors are returned as {"error": ...} (status 400 for a bad request,
+# 500 otherwise), a bad query never failing the other queries of its
+# batch. The undefined values (NaN, on the wires for example) are
+# written as null. The functions "define()" and "field()" are the
+# client side: the errors of the service are raised as ValueError
+# (status 4xx) or RuntimeError (status 5xx) with the message of the
+# service.
+
+# from "https://numpy.org/"
+from numpy import asarray
+from numpy import concatenate
+from numpy import cumsum
+from numpy import isfinite
+from numpy import where
+
+# from the standard library
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread, Event, Lock
+from queue import Queue, Empty
+from time import monotonic
+from urllib.request import urlopen, Request
+from urllib.error import HTTPError
+import json
+
+# from local module "pygnetti.py"
+from pygnetti import coil
+
+# nested lists of the array A for JSON (the values that are not
+# finite are written as null)
+def _list(A):
+    A = asarray(A, dtype = float)
+    return where(isfinite(A), A, None).tolist()
+
+################################################## BATCHER
+
+# a query waiting for its batch
+class _query:
+
+    def __init__(self, X, Z):
+        self.X, self.Z = X, Z
+        self.done = Event()
+        self.result, self.error = None, None
+        return
+
+class batcher:
+
+    # the queries of the coil "c" are collected during "window"
+    # seconds (at most "points" points per batch)
+    def __init__(self, c, window = 0.002, points = 1<<20):
+        self.coil, self.window, self.points = c, window, points
+        self.queue = Queue()
+        self.requests, self.batches = 0, 0
+        Thread(target = self.run, daemon = True).start()
+        return
+
+    # evaluate the field at the points (X, Z) (called by the
+    # request threads: waits for the batch). The points are checked
+    # before they join a batch: a bad query fails alone.
+    def field(self, X, Z):
+        q = _query(asarray(X, dtype = float), asarray(Z, dtype = float))
+        if q.X.shape != q.Z.shape:
+            raise ValueError(f"x and z have different shapes {q.X.shape} and {q.Z.shape}")
+        if not (isfinite(q.X).all() and isfinite(q.Z).all()):
+            raise ValueError("x and z must be finite")
+        self.queue.put(q)
+        q.done.wait()
+        if q.error is not None: raise q.error
+        return q.result
+
+    # collect the queries and evaluate them by batches
+    def run(self):
+        while True:
+            Q = [self.queue.get()]
+            n, t = Q[0].X.size, monotonic()+self.window
+            while n < self.points:
+                try:
+                    Q.append(self.queue.get(timeout = max(0.0, t-monotonic())))
+                    n += Q[-1].X.size
+                except Empty:
+                    break
+            try:
+                X = concatenate([q.X.reshape(-1) for q in Q])
+                Z = concatenate([q.Z.reshape(-1) for q in Q])
+                BX, BZ = self.coil.field(X, Z)
+                S = cumsum([0]+[q.X.size for q in Q])
+                for q, i, j in zip(Q, S[:-1], S[1:]):
+                    q.result = BX[i:j].reshape(q.X.shape), BZ[i:j].reshape(q.X.shape)
+            except Exception:
+                # the batch failed: each query is evaluated on its own
+                # (only the faulty ones fail)
+                for q in Q:
+                    try:
+                        q.result = self.coil.field(q.X, q.Z)
+                    except Exception as e:
+                        q.error = e
+            self.requests += len(Q)
+            self.batches += 1
+            for q in Q: q.done.set()
+        return
+
+################################################## SERVICE
+
+class _handler(BaseHTTPRequestHandler):
+
+    def reply(self, code, D):
+        B = json.dumps(D, allow_nan = False).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(B)))
+        self.end_headers()
+        self.wfile.write(B)
+        return
+
+    def do_GET(self):
+        s = self.server
+        if self.path == "/coils":
+            return self.reply(200, {k: b.coil.geometry for k, b in s.coils.items()})
+        if self.path == "/stats":
+            return self.reply(200, {k: {"requests": b.requests, "batches": b.batches}
+                for k, b in s.coils.items()})
+        return self.reply(404, {"error": f"unknown path '{self.path}'"})
+
+    def do_POST(self):
+        s = self.server
+        try:
+            D = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if self.path == "/coil":
+                s.define(D.pop("name"), **D)
+                return self.reply(200, {})
+            if self.path == "/field":
+                if D["coil"] not in s.coils:
+                    return self.reply(404, {"error": f"unknown coil '{D['coil']}'"})
+                BX, BZ = s.coils[D["coil"]].field(D["x"], D["z"])
+                return self.reply(200, {"bx": _list(BX), "bz": _list(BZ)})
+        except (ValueError, KeyError, TypeError) as e:
+            return self.reply(400, {"error": repr(e)})
+        except Exception as e:
+            return self.reply(500, {"error": repr(e)})
+        return self.reply(404, {"error": f"unknown path '{self.path}'"})
+
+    # no log of the requests
+    def log_message(self, *args):
+        return
+
+class service(ThreadingHTTPServer):
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    # the tables are loaded once and shared by all the coils
+    def __init__(self, port = 8642, table = './J1J2.txt', window = 0.002):
+        ThreadingHTTPServer.__init__(self, ("127.0.0.1", port), _handler)
+        c = coil(table)
+        self.table, self.window = (c.A, c.J1, c.J2), window
+        self.coils, self.lock = {}, Lock()
+        return
+
+    # define the coil "name" (the keywords of "set_geometry()")
+    def define(self, name, **geometry):
+        c = coil(self.table)
+        c.set_geometry(**geometry)
+        # a redefined coil keeps its batcher
+        with self.lock:
+            if name in self.coils: self.coils[name].coil = c
+            else: self.coils[name] = batcher(c, self.window)
+        return
+
+################################################## CLIENT
+
+# send the JSON "D" to the service "url" (GET without "D")
+def _call(url, path, D = None):
+    B = None if D is None else json.dumps(D, allow_nan = False).encode()
+    r = Request(url+path, B, {"Content-Type": "application/json"})
+    try:
+        with urlopen(r) as f:
+            return json.loads(f.read())
+    except HTTPError as e:
+        try: m = json.loads(e.read())["error"]
+        except (ValueError, KeyError, TypeError): m = e.reason
+        raise (ValueError if e.code < 500 else RuntimeError)(
+            f"{path}: {m} (status {e.code})") from None
+
+# define the coil "name" on the service "url"
+def define(url, name, **geometry):
+    return _call(url, "/coil", dict(name = name, **geometry))
+
+# field of the coil "name" at the points (X, Z)
+def field(url, name, X, Z):
+    D = _call(url, "/field", {"coil": name, "x": _list(X), "z": _list(Z)})
+    return asarray(D["bx"], dtype = float), asarray(D["bz"], dtype = float)
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description = "field evaluation service")
+    parser.add_argument("--port", type = int, default = 8642)
+    parser.add_argument("--serve", action = "store_true",
+        help = "serve until interrupted (default: demonstration)")
+    args = parser.parse_args()
+
+    s = service(args.port)
+    s.define("main", radius = 15, height = 10.0, turns = 10, layers = 6)
+    if args.serve:
+        print(f"serving on http://127.0.0.1:{args.port}")
+        s.serve_forever()
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        from time import perf_counter
+        from numpy import linspace
+        Thread(target = s.serve_forever, daemon = True).start()
+        url = f"http://127.0.0.1:{args.port}"
+        t = perf_counter()
+        BX, BZ = field(url, "main", [0.0, 5.0], [0.0, 0.0])
+        print(f"one query: {(perf_counter()-t)*1E3:.1f}ms, "
+            f"central field {BZ[0]:.4f}mT")
+        # 64 clients, 16 queries of 10 points each
+        def client(k):
+            for i in range(16):
+                field(url, "main", linspace(0.0, 10.0, 10), [k*0.1]*10)
+            return
+        t = perf_counter()
+        with ThreadPoolExecutor(64) as X:
+            list(X.map(client, range(64)))
+        t = perf_counter()-t
+        S = _call(url, "/stats")["main"]
+        print(f"{64*16} queries: {t:.3f}s "
+            f"({S['requests']} requests in {S['batches']} kernel calls)")
+        s.shutdown()
@@ -0,0 +1,238 @@
+#!/usr/bin/python3
+# file: sweep.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: parameter sweeps of the coil designs
+# repository: https://github.com/RochSchanen/pygnetti
+
+# A sweep evaluates scalar metrics of the coil designs over all the
+# combinations of the parameters (radius, turns, layers and wire
+# size, as in the demonstration of "pygnetti.py"). The designs are
+# evaluated by a pool of worker processes, by chunks, and the results
+# are stored in a sqlite database indexed by the parameters: the
+# designs already in the store are skipped, and an interrupted sweep
+# resumes where it stopped (the results are committed chunk after
+# chunk).
+
+# metrics:
+# "B0"      central field [mT] (1A)
+# "ppm"     peak to peak deviation of |B| inside the sphere of
+#           diameter "dsv" times the bore diameter [ppm]
+# "L"       inductance [H]
+# "length"  wire length [mm]
+
+# from "https://numpy.org/"
+from numpy import pi
+from numpy import sqrt
+from numpy import log
+from numpy import hypot
+from numpy import array
+from numpy import linspace
+from numpy import meshgrid
+from numpy import fill_diagonal
+
+# from the standard library
+from os import cpu_count
+from itertools import product
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import sqlite3
+
+# from local modules
+from quadlib import ellipke
+from pygnetti import coil
+
+PARAMETERS = ("radius", "turns", "layers", "wire")
+METRICS = ("B0", "ppm", "L", "length")
+
+# mu_0 [H/m]
+MU0 = 4.0*pi*1E-7
+
+################################################## METRICS
+
+# set the geometry of the design (the height of
+# the coil is the number of turns times the wire
+# size)
+def design(c, radius, turns, layers, wire):
+    c.set_geometry(
+        radius = radius,
+        height = wire*turns,
+        turns  = int(turns),
+        layers = int(layers))
+    return c
+
+# field magnitude at the centre [mT]
+def central(c):
+    BX, BZ = c.field(array([0.0]), array([0.0]))
+    return float(hypot(BX, BZ)[0])
+
+# peak to peak deviation of the field magnitude [ppm] inside the
+# sphere of diameter "dsv" times the bore diameter (the points of
+# a n x n grid in the half plane x >= 0 are used)
+def homogeneity(c, dsv = 0.5, n = 16):
+    r = dsv*c.geometry[0]
+    X, Z = meshgrid(linspace(0.0, r, n), linspace(-r, r, 2*n-1))
+    i = X*X+Z*Z <= r*r
+    BX, BZ = c.field(X[i], Z[i])
+    B = hypot(BX, BZ)
+    return float(1E6*(B.max()-B.min())/central(c))
+
+# inductance [H]: the sum of the mutual inductances of all pairs
+# of loops (closed form with the complete elliptic integrals) and
+# of the self inductances of the loops (round wire of diameter
+# "wire", uniform current). The rows are computed by chunks.
+def inductance(c, wire, chunk = 512):
+    R, H = array(c.rl)*1E-3, array(c.hl)*1E-3
+    a = wire*1E-3/2.0
+    L = 0.0
+    for i in range(0, len(R), chunk):
+        r, h = R[i:i+chunk, None], H[i:i+chunk, None]
+        m = 4.0*r*R/((r+R)**2+(h-H)**2)
+        k = sqrt(m)
+        n = min(chunk, len(R)-i)
+        # the diagonal (k = 1) is replaced below
+        m[:, i:i+n][range(n), range(n)] = 0.5
+        K, E = ellipke(m)
+        M = MU0*sqrt(r*R)*((2.0/k-k)*K-2.0/k*E)
+        fill_diagonal(M[:, i:i+n], MU0*R[i:i+n]*(log(8.0*R[i:i+n]/a)-1.75))
+        L += M.sum()
+    return float(L)
+
+# wire length [mm]
+def wirelength(c):
+    return float(2.0*pi*sum(c.rl))
+
+# evaluate the "metrics" of the design "p" (parameters)
+def evaluate(c, p, metrics = METRICS):
+    design(c, *p)
+    f = {
+        "B0":       lambda: central(c),
+        "ppm":      lambda: homogeneity(c),
+        "L":        lambda: inductance(c, p[3]),
+        "length":   lambda: wirelength(c),
+    }
+    return tuple(f[m]() for m in metrics)
+
+################################################## WORKERS
+
+# one coil per worker process (the tables are loaded once)
+_coil = None
+
+def _init(table):
+    global _coil
+    _coil = coil(table)
+    return
+
+# evaluate a chunk of designs
+def _chunk(P, metrics):
+    return [(p, evaluate(_coil, p, metrics)) for p in P]
+
+################################################## STORE
+
+# open (or create) the store "path"
+def store(path):
+    db = sqlite3.connect(path)
+    db.execute(f"CREATE TABLE IF NOT EXISTS results ("
+        f"radius REAL, turns INTEGER, layers INTEGER, wire REAL, "
+        f"{', '.join(f'{m} REAL' for m in METRICS)}, "
+        f"PRIMARY KEY ({', '.join(PARAMETERS)}))")
+    db.commit()
+    return db
+
+# designs of the list P which have all the "metrics" in the store
+def stored(db, P, metrics):
+    Q = db.execute(f"SELECT {', '.join(PARAMETERS)} FROM results "
+        f"WHERE {' AND '.join(f'{m} IS NOT NULL' for m in metrics)}")
+    S = set(Q.fetchall())
+    return [p for p in P if p in S]
+
+# save the results [(p, values), ...] (the other metrics of the
+# designs already in the store are kept)
+def save(db, R, metrics):
+    db.executemany(f"INSERT INTO results "
+        f"({', '.join(PARAMETERS+tuple(metrics))}) "
+        f"VALUES ({', '.join('?'*(len(PARAMETERS)+len(metrics)))}) "
+        f"ON CONFLICT ({', '.join(PARAMETERS)}) DO UPDATE SET "
+        f"{', '.join(f'{m} = excluded.{m}' for m in metrics)}",
+        [p+v for p, v in R])
+    db.commit()
+    return
+
+# query the store: the keywords select the values of the
+# parameters. Returns the rows (parameters and metrics).
+def results(path, **where):
+    db = store(path)
+    W = " AND ".join(f"{k} = ?" for k in where)
+    Q = db.execute(f"SELECT * FROM results"
+        f"{' WHERE '+W if W else ''} ORDER BY {', '.join(PARAMETERS)}",
+        tuple(where.values()))
+    R = Q.fetchall()
+    db.close()
+    return R
+
+################################################## SWEEP
+
+# evaluate the "metrics" of all the combinations of the parameter
+# values and store them in "path". The designs are sent to the
+# "workers" by chunks of "chunk" designs (with "workers = 0" they
+# are evaluated in the calling process). Returns the number of
+# designs evaluated and the number of designs found in the store.
+def sweep(path, radius, turns, layers, wire, metrics = METRICS,
+        workers = None, chunk = 16, table = './J1J2.txt', verbose = True):
+    # the parameters are normalised to match the store types
+    P = sorted(set(product(
+        [float(v) for v in radius],
+        [int(v) for v in turns],
+        [int(v) for v in layers],
+        [float(v) for v in wire])))
+    db = store(path)
+    S = set(stored(db, P, metrics))
+    P = [p for p in P if p not in S]
+    C = [P[i:i+chunk] for i in range(0, len(P), chunk)]
+    n = 0
+    if workers == 0:
+        _init(table)
+        for c in C:
+            save(db, _chunk(c, metrics), metrics)
+            n += len(c)
+            if verbose: print(f"{n}/{len(P)} designs")
+    else:
+        with ProcessPoolExecutor(workers or cpu_count(),
+                initializer = _init, initargs = (table,)) as X:
+            F = [X.submit(_chunk, c, metrics) for c in C]
+            for f in as_completed(F):
+                R = f.result()
+                save(db, R, metrics)
+                n += len(R)
+                if verbose: print(f"{n}/{len(P)} designs")
+    db.close()
+    return n, len(S)
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description = "sweep the coil designs")
+    parser.add_argument("--store", default = "sweep.db",
+        help = "sqlite results store")
+    parser.add_argument("--radius", type = float, nargs = "+",
+        default = [10.0, 15.0, 20.0], help = "bore radii [mm]")
+    parser.add_argument("--turns", type = int, nargs = "+",
+        default = [5, 10, 20], help = "turns on the first layer")
+    parser.add_argument("--layers", type = int, nargs = "+",
+        default = [2, 4, 8], help = "number of layers")
+    parser.add_argument("--wire", type = float, nargs = "+",
+        default = [0.5, 1.0], help = "wire sizes [mm]")
+    parser.add_argument("--metrics", nargs = "+", default = list(METRICS),
+        choices = METRICS, help = "metrics to compute")
+    parser.add_argument("--workers", type = int, default = None,
+        help = "number of worker processes (0: none)")
+    parser.add_argument("--chunk", type = int, default = 16,
+        help = "designs per batch")
+    args = parser.parse_args()
+
+    n, s = sweep(args.store, args.radius, args.turns, args.layers,
+        args.wire, args.metrics, args.workers, args.chunk)
+    print(f"{n} designs evaluated, {s} found in the store")
+    for r in results(args.store):
+        print(" ".join(f"{v:10.4g}" if v is not None else f"{'-':>10}"
+            for v in r))
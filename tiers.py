@@ -0,0 +1,308 @@
+#!/usr/bin/python3
+# file: tiers.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: field evaluation at a requested relative tolerance
+# repository: https://github.com/RochSchanen/pygnetti
+
+# The points are evaluated by blocks. For each block, the cheapest
+# method that meets the relative tolerance "tol" is used:
+#
+# "multipole"   far from the coil (outside the sphere that contains
+#               all the loops), the exterior multipole expansion of
+#               the coil (closed form coefficients). The order is
+#               doubled until the bound of the truncation error meets
+#               the tolerance (cost: the order, per point).
+# "aggregated"  away from the windings, the loops are lumped into
+#               cells: one loop per cell, with the same dipole and
+#               quadrupole moments. The error of a cell is bounded
+#               by 2(e/D)^2(1+D/r) times the magnitude of its own
+#               field (e: largest distance of a loop to the loop of
+#               its cell, D: distance of the block to the windings,
+#               r: smallest radius of the cells; the largest ratio
+#               measured is below 1.6, up to D = 100r). The
+#               bounds of the cells (and the error of the tables)
+#               are summed at each point and compared to the
+#               tolerance times the magnitude of the field computed
+#               (the contributions of the cells can cancel): the
+#               coarsest level of cells that meets the tolerance at
+#               all the points of the block is used.
+# "table"       the loops of the coil with the interpolated tables
+#               ("coil.field()"): the error of the tables is measured
+#               when the evaluator is built.
+# "exact"       the loops of the coil with the complete elliptic
+#               integrals computed by the AGM ("quadlib.ellipke()").
+#
+# The tiers used are reported for each block. The coil is an
+# axisymmetric coil (see "pygnetti.py", the loops carry 1A).
+
+# from "https://numpy.org/"
+from numpy import pi
+from numpy import sin
+from numpy import cos
+from numpy import sqrt
+from numpy import abs
+from numpy import sign
+from numpy import hypot
+from numpy import array
+from numpy import arange
+from numpy import log10
+from numpy import asarray
+from numpy import zeros
+from numpy import zeros_like
+from numpy import floor
+from numpy import lexsort
+from numpy import nonzero
+from numpy import concatenate
+from numpy import logspace
+from numpy import where
+from numpy import errstate
+from numpy.random import default_rng
+
+# from local modules
+from quadlib import ellipke
+
+################################################## EXACT KERNEL
+
+# field of one loop of radius r at the height h at the points
+# (X, Z) computed with the complete elliptic integrals (mm, mT).
+# The arrays r and h can be columns (loops x points).
+def exactfield(r, h, X, Z):
+    # the radial component is odd in x
+    S, X = sign(X), abs(X)
+    ZH = Z-h
+    Q = (r+X)**2+ZH**2
+    K, E = ellipke(4.0*r*X/Q)
+    D = (r-X)**2+ZH**2
+    # mu_0/2/pi = 2E-7, lengths in mm, field in mT
+    f = 0.2/sqrt(Q)
+    BZ = f*(K+(r*r-X*X-ZH*ZH)/D*E)
+    # the radial component vanishes on the axis
+    with errstate(divide = "ignore", invalid = "ignore"):
+        BX = where(X > 0.0, f*ZH/X*(-K+(r*r+X*X+ZH*ZH)/D*E), 0.0)
+    return S*BX, BZ
+
+# largest relative error of the interpolated tables of the coil "c"
+# (twice the error measured). The kernel depends only on the ratio
+# of the distances to the radius: the error is sampled around a loop
+# of radius 1.
+def tablerror(c, n = 20000):
+    g = default_rng(0)
+    d, t = logspace(-3.0, 2.0, n), g.uniform(0.0, pi, n)
+    X, Z = abs(1.0+d*cos(t)), d*sin(t)
+    TX, TZ = c.loop_field(1.0, 0.0, X, Z)
+    EX, EZ = exactfield(1.0, 0.0, X, Z)
+    return 2.0*(hypot(TX-EX, TZ-EZ)/hypot(EX, EZ)).max()
+
+# spatial blocks of the points (X, Z): the points are sorted by
+# square tiles of the half plane (|x|, z) holding about n points
+# each (for evenly spread points), the tiles of more than n points
+# being split. Returns the index arrays of the blocks.
+def tiles(X, Z, n):
+    A = abs(X)
+    if len(A) <= n: return [arange(len(A))]
+    a, z = A.max()-A.min(), Z.max()-Z.min()
+    w = sqrt(a*z*n/len(A)) if a*z > 0.0 else max(a, z)*n/len(A)
+    # all the points are at the same position
+    if w == 0.0: w = 1.0
+    i, j = floor((A-A.min())/w), floor((Z-Z.min())/w)
+    o = lexsort((i, j))
+    k = nonzero((i[o][1:] != i[o][:-1]) | (j[o][1:] != j[o][:-1]))[0]+1
+    b = concatenate(([0], k, [len(o)]))
+    return [o[q:min(q+n, r)] for p, r in zip(b[:-1], b[1:]) for q in range(p, r, n)]
+
+################################################## EVALUATOR
+
+class evaluator:
+
+    # "nmax" is the largest order of the multipole expansion
+    def __init__(self, c, nmax = 64):
+        self.coil = c
+        self.R, self.H = array(c.rl, dtype = float), array(c.hl, dtype = float)
+        self.I = 1.0+0.0*self.R
+        self.multipoles(nmax)
+        self.aggregates()
+        self.tablerror()
+        return
+
+    # coefficients of the exterior multipole expansion of the
+    # loops: C[n] (the potential is the sum of C[n]P_n(z/r)/r^(n+1))
+    # and the bounds W[n] of the terms of the fields. "dmax" is the
+    # radius of the sphere that contains the loops.
+    def multipoles(self, nmax):
+        R, H = self.R, self.H
+        d = hypot(R, H)
+        x = H/d
+        # P_n(x), P'_n(x) by recurrence
+        C, P0, P1, D0, D1 = zeros(nmax+1), 1.0+0.0*x, x, 0.0*x, 1.0+0.0*x
+        for n in range(1, nmax+1):
+            # mu_0/2 = 2 pi 1E-7, lengths in mm, field in mT
+            C[n] = (0.2*pi*R*R*d**(n-1)*D1/(n+1)).sum()
+            P0, P1, D0, D1 = P1, ((2*n+1)*x*P1-n*P0)/(n+1), D1, D0+(2*n+1)*P1
+        self.C, self.dmax = C, d.max()
+        N = arange(nmax+1)
+        self.W = abs(C)*(N+1)*(N+2)/2.0*sqrt(2.0)
+        # beyond nmax: |P'_n| <= n(n+1)/2 and d <= dmax
+        self.G = 0.2*pi*(R*R).sum()/self.dmax**3*sqrt(2.0)/4.0
+        return
+
+    # cells levels: the level k has cells of size S/2^k where S
+    # is the size of the windings. Each level is recorded with its
+    # loops (radii, heights, currents) and its error length "e".
+    def aggregates(self):
+        R, H = self.R, self.H
+        self.box = R.min(), R.max(), H.min(), H.max()
+        S = max(R.max()-R.min(), H.max()-H.min())
+        self.levels, k = [], 0
+        while S > 0.0:
+            s = S/2**k
+            I = floor((R-R.min())/s).astype(int)
+            J = floor((H-H.min())/s).astype(int)
+            cells = {}
+            for i, key in enumerate(zip(I, J)):
+                cells.setdefault(key, []).append(i)
+            C = [array(i) for i in cells.values()]
+            if len(C) > len(R)/2: break
+            # same dipole (sum of r^2) and quadrupole (sum of r^2 h)
+            ai = array([float(len(i)) for i in C])
+            r2 = array([(R[i]**2).sum() for i in C])
+            ar = sqrt(r2/ai)
+            ah = array([(R[i]**2*H[i]).sum() for i in C])/r2
+            e = max(hypot(R[i]-r, H[i]-h).max() for i, r, h in zip(C, ar, ah))
+            self.levels.append((ar, ah, ai, e))
+            k += 1
+        return
+
+    # error of the interpolated tables
+    def tablerror(self, n = 20000):
+        self.terr = tablerror(self.coil, n)
+        return
+
+    # multipole expansion of order N at the points (X, Z)
+    def expansion(self, X, Z, N):
+        r = hypot(X, Z)
+        u = Z/r
+        BX, BZ = zeros_like(X), zeros_like(Z)
+        P0, P1, D0, D1 = 1.0+0.0*u, u, 0.0*u, 1.0+0.0*u
+        q = 1.0/r/r
+        for n in range(1, N+1):
+            q = q/r
+            BX += self.C[n]*X*q/r*((n+1)*P1+u*D1)
+            BZ += self.C[n]*q*((n+1)*u*P1-(1.0-u*u)*D1)
+            P0, P1, D0, D1 = P1, ((2*n+1)*u*P1-n*P0)/(n+1), D1, D0+(2*n+1)*P1
+        return BX, BZ
+
+    # bounds of the truncation errors of the expansions at the
+    # distance r: T[N] is the bound for the order N (the terms
+    # beyond nmax are bounded by G n(n+1)(n+2) q^(n+2), q = dmax/r,
+    # up to q^n < 1E-20). The bounds decrease with r.
+    def tails(self, r):
+        W, q = self.W, self.dmax/r
+        n = arange(len(W))
+        T = (W/r**(n+2))[::-1].cumsum()[::-1]
+        n = arange(len(W), len(W)+int(-20.0/log10(q))+1)
+        R = self.G*(n*(n+1)*(n+2)*q**(n+2)).sum()
+        T[:-1] = T[1:]
+        T[-1] = 0.0
+        return T+R
+
+    # field of the loops (radii R, heights H, currents I) with the
+    # kernel "f" (tables or exact) by chunks of (loops x points).
+    # With "magnitude", the sum of the magnitudes of the fields of
+    # the loops is returned as well.
+    def loops(self, R, H, I, X, Z, f = None, chunk = 1<<14, magnitude = False):
+        f = f or self.coil.loop_field
+        BX, BZ, S = zeros_like(X), zeros_like(Z), zeros_like(X)
+        m = max(1, chunk//len(X))
+        for k in range(0, len(R), m):
+            bx, bz = f(R[k:k+m, None], H[k:k+m, None], X, Z)
+            BX += I[k:k+m] @ bx
+            BZ += I[k:k+m] @ bz
+            if magnitude: S += abs(I[k:k+m]) @ hypot(bx, bz)
+        return (BX, BZ, S) if magnitude else (BX, BZ)
+
+    # field of the coil with the exact kernel
+    def exact(self, X, Z):
+        return self.loops(self.R, self.H, self.I, X, Z, exactfield)
+
+    # evaluate one block at the tolerance "tol": returns BX, BZ,
+    # the tier and its size (order of the expansion or number
+    # of loops)
+    def block(self, X, Z, tol):
+        r = hypot(X, Z).min()
+        # multipole expansion
+        if r > 1.1*self.dmax:
+            N, nmax = 4, len(self.W)-1
+            T = self.tails(r)
+            while True:
+                BX, BZ = self.expansion(X, Z, N)
+                if T[N] <= tol*(hypot(BX, BZ).min()-T[N]):
+                    return BX, BZ, "multipole", N
+                if N == nmax: break
+                N = min(2*N, nmax)
+        # aggregated loops
+        rs, re, hs, he = self.box
+        A = abs(X)
+        D = hypot(where(A < rs, rs-A, where(A > re, A-re, 0.0)),
+                  where(Z < hs, hs-Z, where(Z > he, Z-he, 0.0))).min()
+        for ar, ah, ai, e in self.levels:
+            b = 2.0*(e/D)**2*(1.0+D/ar.min())+self.terr if D > 0.0 else None
+            if b is not None and b <= tol:
+                BX, BZ, S = self.loops(ar, ah, ai, X, Z, magnitude = True)
+                # the bound is met at all the points of the block
+                if (b*S <= tol*hypot(BX, BZ)).all():
+                    return BX, BZ, "aggregated", len(ar)
+        # full sums
+        if self.terr <= tol:
+            BX, BZ = self.loops(self.R, self.H, self.I, X, Z)
+            return BX, BZ, "table", len(self.R)
+        BX, BZ = self.exact(X, Z)
+        return BX, BZ, "exact", len(self.R)
+
+    # field at the points (X, Z) (any shape) at the relative
+    # tolerance "tol": the points are taken by spatial blocks of
+    # at most "block" points (see "tiles()"). Returns BX, BZ and
+    # the report [(indices, tier, size), ...] (the indices of the
+    # points of the block in the flattened arrays).
+    def field(self, X, Z, tol = 1E-6, block = 1024):
+        X, Z = asarray(X, dtype = float), asarray(Z, dtype = float)
+        x, z = X.reshape(-1), Z.reshape(-1)
+        BX, BZ = zeros_like(x), zeros_like(z)
+        report = []
+        for P in tiles(x, z, block):
+            BX[P], BZ[P], t, n = self.block(x[P], z[P], tol)
+            report.append((P, t, n))
+        return BX.reshape(X.shape), BZ.reshape(Z.shape), report
+
+if __name__ == "__main__":
+
+    from time import perf_counter
+    from numpy import linspace, meshgrid
+    from pygnetti import coil
+
+    c = coil()
+    c.set_geometry(radius = 15, height = 20.0, turns = 40, layers = 20)
+    e = evaluator(c)
+    print(f"{len(c.rl)} loops, table error {e.terr:.1E}, "
+        f"aggregation levels {[len(l[0]) for l in e.levels]}")
+
+    # map around the coil (blocks of 256 points)
+    x = linspace(-100.0, 100.0, 256)
+    X, Z = meshgrid(x, x)
+
+    t = perf_counter()
+    RX, RZ = e.exact(X.reshape(-1), Z.reshape(-1))
+    print(f"exact: {perf_counter()-t:.3f}s")
+    t = perf_counter()
+    c.field(X, Z)
+    print(f"table: {perf_counter()-t:.3f}s")
+    for tol in (1E-2, 1E-4, 1E-9):
+        t = perf_counter()
+        BX, BZ, report = e.field(X, Z, tol, 256)
+        t = perf_counter()-t
+        E = hypot(BX.reshape(-1)-RX, BZ.reshape(-1)-RZ)/hypot(RX, RZ)
+        used = {}
+        for P, tier, n in report:
+            used[tier] = used.get(tier, 0)+1
+        print(f"tol {tol:.0E}: {t:.3f}s, max error {E.max():.1E}, "
+            + ", ".join(f"{k} {v}" for k, v in used.items()))
@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+# file: tiles.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: field maps computed by tiles into memory mapped files
+# repository: https://github.com/RochSchanen/pygnetti
+
+# The grid of "set_grid()" (xOz plane, arrays of shape (zn, xn)) is
+# split into square tiles. The points of a tile are built from the
+# axes of the grid (the grid is never allocated), the field of the
+# tile is computed and written into the memory mapped files BX.npy
+# and BZ.npy (numpy format), and the number of tiles completed is
+# recorded in the small file "manifest.json" once the tile is
+# flushed to the disk. The map can be much larger than the memory,
+# and an interrupted computation resumes from the first tile that
+# was not recorded. The files are found in the directory "path".
+
+# from "https://numpy.org/"
+from numpy import linspace
+from numpy import meshgrid
+from numpy import dtype as _dtype
+from numpy import float64
+from numpy.lib.format import open_memmap
+
+# from the standard library
+from os import makedirs, replace
+from os.path import join, exists
+import json
+
+# read the manifest of the map "path" (None if there is none)
+def manifest(path):
+    if not exists(join(path, "manifest.json")): return None
+    with open(join(path, "manifest.json")) as f:
+        return json.load(f)
+
+# write the manifest (the file is replaced at once: a crash leaves
+# either the previous manifest or the new one)
+def _record(path, M):
+    with open(join(path, "manifest.json.tmp"), "w") as f:
+        json.dump(M, f)
+    replace(join(path, "manifest.json.tmp"), join(path, "manifest.json"))
+    return
+
+# compute the map of the field function "f" (f(X, Z) returns BX,
+# BZ, for example "coil.field") on the grid (xs, xe, xn, zs, ze, zn)
+# by tiles of "tile" x "tile" points, in the directory "path". An
+# existing map of the same grid is resumed. At most "stop" tiles
+# are computed by this call. Returns the arrays BX and BZ (memory
+# mapped) and the manifest.
+def tiledmap(path, f, xs, xe, xn, zs, ze, zn, tile = 512,
+        dtype = float64, stop = None, verbose = True):
+    M = {
+        "grid":     [float(xs), float(xe), int(xn), float(zs), float(ze), int(zn)],
+        "tile":     int(tile),
+        "dtype":    _dtype(dtype).str,
+        "tiles":    -(-int(zn)//tile)*-(-int(xn)//tile),
+        "done":     0,
+    }
+    R = manifest(path)
+    if R is None:
+        makedirs(path, exist_ok = True)
+        BX = open_memmap(join(path, "BX.npy"), mode = "w+", dtype = dtype, shape = (zn, xn))
+        BZ = open_memmap(join(path, "BZ.npy"), mode = "w+", dtype = dtype, shape = (zn, xn))
+        _record(path, M)
+    else:
+        M["done"] = R["done"]
+        if R != M:
+            raise ValueError(f"the map '{path}' has a different grid, tile or type")
+        BX = open_memmap(join(path, "BX.npy"), mode = "r+")
+        BZ = open_memmap(join(path, "BZ.npy"), mode = "r+")
+    x, z = linspace(xs, xe, xn), linspace(zs, ze, zn)
+    nx = -(-xn//tile)
+    n = 0
+    for k in range(M["done"], M["tiles"]):
+        if stop is not None and n >= stop: break
+        i, j = (k//nx)*tile, (k%nx)*tile
+        X, Z = meshgrid(x[j:j+tile], z[i:i+tile])
+        BX[i:i+tile, j:j+tile], BZ[i:i+tile, j:j+tile] = f(X, Z)
+        BX.flush()
+        BZ.flush()
+        M["done"] = k+1
+        _record(path, M)
+        n += 1
+        if verbose: print(f"tile {k+1}/{M['tiles']}")
+    return BX, BZ, M
+
+# open the map "path" for reading: returns the arrays BX and BZ
+# (memory mapped) and the manifest (the map is complete when all
+# the tiles are done)
+def openmap(path):
+    M = manifest(path)
+    if M is None:
+        raise ValueError(f"no map found in '{path}'")
+    BX = open_memmap(join(path, "BX.npy"), mode = "r")
+    BZ = open_memmap(join(path, "BZ.npy"), mode = "r")
+    return BX, BZ, M
+
+if __name__ == "__main__":
+
+    from time import perf_counter
+    from shutil import rmtree
+    from numpy import float32, allclose
+    from pygnetti import coil
+
+    c = coil()
+    c.set_geometry(radius = 15, height = 10.0, turns = 10, layers = 6)
+    grid = -40.0, 40.0, 1000, -40.0, 40.0, 1000
+    if exists("tiles.map"): rmtree("tiles.map")
+
+    # interrupted after 10 tiles, then resumed
+    t = perf_counter()
+    tiledmap("tiles.map", c.field, *grid, tile = 128, dtype = float32,
+        stop = 10, verbose = False)
+    BX, BZ, M = tiledmap("tiles.map", c.field, *grid, tile = 128,
+        dtype = float32, verbose = False)
+    t = perf_counter()-t
+    print(f"{M['done']}/{M['tiles']} tiles: {t:.3f}s")
+
+    # compare with the grid computed in memory
+    BX, BZ, M = openmap("tiles.map")
+    c.set_grid(*grid)
+    c.computeCoil()
+    print(f"same as the grid: {allclose(BZ, c.BZ, rtol = 1E-6, atol = 1E-6)}")
@@ -0,0 +1,178 @@
+#!/usr/bin/python3
+# file: tilted.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: loops of arbitrary centre and orientation
+# repository: https://github.com/RochSchanen/pygnetti
+
+# The loops are defined by their radius, their centre and the unit
+# vector normal to their plane (the current turns anticlockwise
+# around the normal). The points are transformed into the frame of
+# each loop, where the field is the field of a coaxial loop computed
+# by "coil.loop_field()" (fast interpolation of the elliptic
+# integrals), and the field is rotated back to the components BX, BY
+# and BZ. The loops that share the same normal share the same frame:
+# the points are rotated once for all the loops of a group, and the
+# fields of the loops of a group are computed together by chunks of
+# (loops x points). This is used to model misaligned or tilted coils
+# (see "add_coil()"). The units are those of "pygnetti.py".
+
+# from "https://numpy.org/"
+from numpy import pi
+from numpy import sin
+from numpy import cos
+from numpy import sqrt
+from numpy import array
+from numpy import asarray
+from numpy import linspace
+from numpy import zeros_like
+from numpy import cross
+from numpy import meshgrid
+from numpy import broadcast_arrays
+from numpy import where
+from numpy import errstate
+
+# from local module "pygnetti.py"
+from pygnetti import coil
+
+# rotation matrix from the main frame to the frame of a loop
+# of normal n: the rows are the unit vectors u, v and n
+def frame(n):
+    n = asarray(n, dtype = float)
+    n = n/sqrt(n @ n)
+    a = array([1.0, 0.0, 0.0]) if abs(n[0]) < 0.9 else array([0.0, 1.0, 0.0])
+    u = cross(a, n)
+    u /= sqrt(u @ u)
+    return array([u, cross(n, u), n])
+
+# the loops are used as a coil (set_grid(), computeCoil(),
+# field(), draw_grid()): the tables are loaded by the coil
+class loops(coil):
+
+    def __init__(self, table = './J1J2.txt'):
+        coil.__init__(self, table)
+        # normal -> (frame, radii, centres, currents)
+        self.groups3 = {}
+        return
+
+    # add one loop of radius r [mm] centred on the point "centre"
+    # [mm] with the normal "normal" and the current [A]
+    def add_loop3(self, r, centre = (0.0, 0.0, 0.0),
+            normal = (0.0, 0.0, 1.0), current = 1.0):
+        n = asarray(normal, dtype = float)
+        n = n/sqrt(n @ n)
+        # the key identifies the groups of loops of same orientation
+        key = tuple(n.round(12)+0.0)
+        if key not in self.groups3:
+            self.groups3[key] = (frame(n), [], [], [])
+        M, R, C, I = self.groups3[key]
+        R.append(float(r))
+        C.append(asarray(centre, dtype = float))
+        I.append(float(current))
+        return
+
+    # add the loops of the coil "c" (see "set_geometry()"):
+    # the axis Oz of the coil is moved to "centre" and "normal"
+    def add_coil(self, c, centre = (0.0, 0.0, 0.0),
+            normal = (0.0, 0.0, 1.0), current = 1.0):
+        n = asarray(normal, dtype = float)
+        n = n/sqrt(n @ n)
+        for h, r in zip(c.hl, c.rl):
+            self.add_loop3(r, asarray(centre)+h*n, n, current)
+        return
+
+    # field of the loops at the points (X, Y, Z) [mm]: the arrays
+    # can be of any shape. At most "chunk" (loops x points) pairs
+    # are computed at once.
+    def field3(self, X, Y, Z, chunk = 1<<18):
+        X, Y, Z = broadcast_arrays(*(asarray(V, dtype = float) for V in (X, Y, Z)))
+        shape = X.shape
+        P = array([X.reshape(-1), Y.reshape(-1), Z.reshape(-1)])
+        B = zeros_like(P)
+        for M, R, C, I in self.groups3.values():
+            # points and centres in the frame of the group
+            x, y, z = M @ P
+            R, I = array(R)[:, None], array(I)[:, None]
+            C = array(C) @ M.T
+            L = zeros_like(P)
+            m = max(1, chunk//max(1, len(x)))
+            for k in range(0, len(R), m):
+                dx = x-C[k:k+m, 0, None]
+                dy = y-C[k:k+m, 1, None]
+                rho = sqrt(dx*dx+dy*dy)
+                BR, BZ = self.loop_field(R[k:k+m], C[k:k+m, 2, None], rho, z)
+                # the radial component vanishes on the axis
+                with errstate(divide = "ignore", invalid = "ignore"):
+                    BR = where(rho > 0.0, I[k:k+m]*BR/rho, 0.0)
+                L[0] += (BR*dx).sum(0)
+                L[1] += (BR*dy).sum(0)
+                L[2] += (I[k:k+m]*BZ).sum(0)
+            # back to the main frame
+            B += M.T @ L
+        return B[0].reshape(shape), B[1].reshape(shape), B[2].reshape(shape)
+
+    # field at the points (X, Z) of the plane xOz
+    def field(self, X, Z):
+        BX, BY, BZ = self.field3(X, 0.0, Z)
+        return BX, BZ
+
+    # field on the 3D grid of axes x, y and z [mm] (shape (z, y, x)):
+    # there is no symmetry, the field is computed at every point
+    def volume_field(self, x, y, z, nrho = None):
+        return self.field3(*meshgrid(z, y, x, indexing = "ij")[::-1])
+
+    # draw the loops projected onto the plane xOz
+    def draw_wires(self, psdoc):
+        t = linspace(0.0, 2.0*pi, 65)
+        for M, R, C, I in self.groups3.values():
+            for r, c in zip(R, C):
+                P = c[:, None]+M.T @ array([r*cos(t), r*sin(t), 0.0*t])
+                psdoc.polyline(P[0], P[2], True)
+        return
+
+    # the component BY of the grid field is recorded as
+    # well (it does not vanish in general)
+    def set_grid(self, xs, xe, xn, zs, ze, zn):
+        coil.set_grid(self, xs, xe, xn, zs, ze, zn)
+        self.BY = zeros_like(self.X)
+        return
+
+    # compute the field at the grid points
+    def computeCoil(self):
+        BX, BY, BZ = self.field3(self.X, 0.0, self.Z)
+        self.BX += BX
+        self.BY += BY
+        self.BZ += BZ
+        return
+
+if __name__ == "__main__":
+
+    from time import perf_counter
+    from segments import conductor, loop
+
+    # a tilted off-axis loop compared to the segments engine
+    l = loops()
+    centre, normal = (2.0, -1.0, 3.0), (0.3, 0.2, 1.0)
+    l.add_loop3(10.0, centre, normal)
+    M = frame(normal)
+    w = conductor(asarray(centre)+loop(10.0, 0.0, 4096) @ M)
+    X, Y, Z = linspace(-5.0, 5.0, 11), linspace(-2.0, 2.0, 11), 0.5
+    E = array(l.field3(X, Y, Z))-array(w.field3(X, Y, Z))
+    print(f"tilted loop: max deviation from the segments "
+        f"{abs(E).max()/abs(array(w.field3(X, Y, Z))).max():.1E}")
+
+    # a coil tilted by 1 degree compared to the aligned coil
+    c = coil()
+    c.set_geometry(radius = 15, height = 10.0, turns = 10, layers = 6)
+    a = pi/180.0
+    l = loops()
+    l.add_coil(c, normal = (sin(a), 0.0, cos(a)))
+    l.set_grid(-10.0, 10.0, 101, -10.0, 10.0, 101)
+    t = perf_counter()
+    l.computeCoil()
+    t = perf_counter()-t
+    c.set_grid(-10.0, 10.0, 101, -10.0, 10.0, 101)
+    c.computeCoil()
+    print(f"{len(c.rl)} loops, {l.X.size} points: {t:.3f}s")
+    print(f"central field {l.BX[50, 50]:.4f}, {l.BY[50, 50]:.1E}, "
+        f"{l.BZ[50, 50]:.4f}mT (aligned {c.BZ[50, 50]:.4f}mT)")
@@ -0,0 +1,196 @@
+#!/usr/bin/python3
+# file: treecode.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: treecode evaluation of the field of large coils
+# repository: https://github.com/RochSchanen/pygnetti
+
+# The loops of the coil are sorted into a tree by recursive bisection
+# of their cross section (r, h): every node covers a box of loops and
+# holds four equivalent loops, each carrying a quarter of the current
+# of the node, placed on the principal axes of the cross section of
+# its loops so that the mean position and the second moments (the
+# covariance of r and h) are those of the loops, and the largest
+# distance "e" of its loops to their mean position. The points are
+# sorted into blocks the same way.
+#
+# The field of the equivalent loops differs from the field of the
+# loops by terms of third order: near the node in e/D (D: distance
+# from the loops), far from it in e^3/(r^2 D) (r: mean radius, the
+# third moments are not preserved). The error of a node is bounded by
+# rho S, with rho = (e/D)^3(1+(D/r)^2) and S the sum of the field
+# magnitudes of the equivalent loops (the largest ratio measured is
+# below 0.5, up to D = 100r). For each block the tree is descended
+# from the root: a node is used as a whole when rho <= theta^3 (D:
+# distance between the box of the block and the box of the node),
+# otherwise its children are visited, down to the loops of the leaves.
+# The equivalent loops and the loops of a block are evaluated together
+# by one vectorised call of the kernel, and the cost falls from (loops
+# x points) to about (log(loops) x points).
+#
+# The bounds of the nodes used are summed at each point, and compared
+# to the tolerance times the magnitude of the field computed: where
+# the contributions cancel (small fields) the block is evaluated again
+# with theta halved, until the bound is met or the loops are used
+# directly. The error of the interpolated tables ("terr", measured as
+# in "tiers.py") is part of the tolerance: the tables are used when
+# terr <= tol/2, the exact kernel otherwise.
+
+# from "https://numpy.org/"
+from numpy import sqrt
+from numpy import abs
+from numpy import hypot
+from numpy import full
+from numpy import zeros
+from numpy import array
+from numpy import asarray
+from numpy import arange
+from numpy import maximum
+from numpy import zeros_like
+from numpy import concatenate
+from numpy import argpartition
+from numpy.linalg import eigh
+
+# from local module "tiers.py"
+from tiers import exactfield, tablerror
+
+# boxes (x0, x1, z0, z1) and distance between two boxes
+def _box(X, Z):
+    return X.min(), X.max(), Z.min(), Z.max()
+
+def _distance(A, B):
+    dx = max(A[0]-B[1], B[0]-A[1], 0.0)
+    dz = max(A[2]-B[3], B[2]-A[3], 0.0)
+    return hypot(dx, dz)
+
+# recursive bisection of the points (X, Z): the index arrays of
+# the groups of at most n points (split at the median of the
+# largest extent)
+def bisect(X, Z, n, I = None):
+    if I is None: I = arange(len(X))
+    if len(I) <= n: return [I]
+    x0, x1, z0, z1 = _box(X[I], Z[I])
+    V = X[I] if x1-x0 >= z1-z0 else Z[I]
+    k = len(I)//2
+    J = argpartition(V, k)
+    return bisect(X, Z, n, I[J[:k]])+bisect(X, Z, n, I[J[k:]])
+
+class treecode:
+
+    # the leaves hold at most "leaf" loops
+    def __init__(self, c, leaf = 16):
+        self.coil = c
+        self.R, self.H = asarray(c.rl, dtype = float), asarray(c.hl, dtype = float)
+        # nodes: box, equivalent loops (radii, heights, currents), e,
+        # mean radius, children (empty for the leaves), loops (leaves
+        # only)
+        self.nodes = []
+        self.root = self.build(arange(len(self.R)), leaf)
+        self.terr = tablerror(c)
+        return
+
+    # build the node of the loops I: returns its index
+    def build(self, I, leaf):
+        R, H = self.R[I], self.H[I]
+        r, h = R.mean(), H.mean()
+        # principal axes: the loops at +-sqrt(2 w) along each axis
+        # have the covariance of the loops
+        dr, dh = R-r, H-h
+        w, V = eigh(array([[dr@dr, dr@dh], [dr@dh, dh@dh]])/len(I))
+        A = sqrt(2.0*maximum(w, 0.0))*V
+        Q = (r+array([A[0, 0], -A[0, 0], A[0, 1], -A[0, 1]]),
+             h+array([A[1, 0], -A[1, 0], A[1, 1], -A[1, 1]]),
+             full(4, len(I)/4.0))
+        e = hypot(dr, dh).max()
+        k = len(self.nodes)
+        self.nodes.append([_box(R, H), Q, e, r, [], I])
+        if len(I) > leaf:
+            self.nodes[k][4] = [self.build(I[J], leaf) for J in bisect(R, H, (len(I)+1)//2)]
+            self.nodes[k][5] = None
+        return k
+
+    # interaction list of the points of the box B: the radii, heights,
+    # currents and error bounds "rho" of the equivalent loops and of
+    # the loops used (the bounds of the loops are 0)
+    def interactions(self, B, theta):
+        R, H, C, W, S = [], [], [], [], [self.root]
+        while S:
+            box, (r, h, n), e, a, children, I = self.nodes[S.pop()]
+            D = _distance(B, box)
+            rho = (e/D)**3*(1.0+(D/a)**2) if D > 0.0 else None
+            if rho is not None and rho <= theta**3:
+                R.append(r), H.append(h), C.append(n), W.append(full(4, rho))
+            elif children:
+                S += children
+            else:
+                R.append(self.R[I]), H.append(self.H[I])
+                C.append(full(len(I), 1.0)), W.append(zeros(len(I)))
+        return concatenate(R), concatenate(H), concatenate(C), concatenate(W)
+
+    # field of the points (x, z) (a block) and the bound of the
+    # error of the nodes used: returns BX, BZ, E and the number of
+    # interactions
+    def block(self, x, z, theta, f, chunk):
+        R, H, C, W = self.interactions(_box(abs(x), z), theta)
+        BX, BZ, E = zeros_like(x), zeros_like(z), zeros_like(x)
+        m = max(1, chunk//len(x))
+        for k in range(0, len(R), m):
+            bx, bz = f(R[k:k+m, None], H[k:k+m, None], x, z)
+            BX += C[k:k+m] @ bx
+            BZ += C[k:k+m] @ bz
+            E += (C[k:k+m]*W[k:k+m]) @ hypot(bx, bz)
+        return BX, BZ, E, len(R), W.any()
+
+    # field at the points (X, Z) (any shape) at the relative tolerance
+    # "tol": the points are taken by blocks of at most "block" points.
+    # Returns BX, BZ and the mean number of interactions per point.
+    def field(self, X, Z, tol = 1E-4, block = 256, chunk = 1<<14):
+        X, Z = asarray(X, dtype = float), asarray(Z, dtype = float)
+        x, z = X.reshape(-1), Z.reshape(-1)
+        BX, BZ = zeros_like(x), zeros_like(z)
+        # the error of the tables is part of the tolerance
+        if self.terr <= tol/2: f, tol = self.coil.loop_field, tol-self.terr
+        else: f = exactfield
+        n = 0
+        # the distances to the loops are computed with |x|
+        for P in bisect(abs(x), z, block):
+            theta = tol**(1.0/3.0)
+            while True:
+                bx, bz, E, m, nodes = self.block(x[P], z[P], theta, f, chunk)
+                n += m*len(P)
+                # the bound is met, or the loops were used directly
+                if not nodes or (E <= tol*hypot(bx, bz)).all(): break
+                theta /= 2.0
+            BX[P], BZ[P] = bx, bz
+        return BX.reshape(X.shape), BZ.reshape(Z.shape), n/max(len(x), 1)
+
+if __name__ == "__main__":
+
+    from time import perf_counter
+    from numpy import linspace, meshgrid
+    from pygnetti import coil
+
+    # errors against the exact kernel
+    X, Z = meshgrid(linspace(-60.0, 60.0, 128), linspace(-60.0, 60.0, 128))
+    c = coil()
+    c.set_geometry(radius = 15, height = 20.0, turns = 100, layers = 50)
+    t = perf_counter()
+    RX, RZ = c.field(X, Z)
+    td = perf_counter()-t
+    EX, EZ = zeros_like(X), zeros_like(Z)
+    for r, h in zip(c.rl, c.hl):
+        bx, bz = exactfield(r, h, X, Z)
+        EX, EZ = EX+bx, EZ+bz
+    t = perf_counter()
+    T = treecode(c)
+    tb = perf_counter()-t
+    E = (hypot(RX-EX, RZ-EZ)/hypot(EX, EZ)).max()
+    print(f"{len(c.rl)} loops: direct {td:.3f}s (error {E:.1E}), "
+        f"tree {tb:.3f}s ({len(T.nodes)} nodes), table error {T.terr:.1E}")
+    for tol in (1E-3, 1E-4, 1E-5, 1E-8):
+        t = perf_counter()
+        BX, BZ, n = T.field(X, Z, tol)
+        t = perf_counter()-t
+        E = (hypot(BX-EX, BZ-EZ)/hypot(EX, EZ)).max()
+        print(f"    tol {tol:.0E}: {t:.3f}s, {n:.0f} interactions "
+            f"per point, max error {E:.1E}")
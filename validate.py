@@ -0,0 +1,204 @@
+#!/usr/bin/python3
+# file: validate.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: accuracy and speed validation of the optimisation tables
+# repository: https://github.com/RochSchanen/pygnetti
+
+# The interpolated J1, J2 (see "pygnetti.py") are compared to the
+# reference integrals of "quadlib.py" (called "exact" below), and
+# the loop field is compared to both the exact kernel and to the
+# brute force Biot-Savart integration ("LoopXY" found in the file
+# "obsolete/development.py"). A set of candidate kernels (cubic and
+# uniform tables of increasing sizes) is then ranked: the smallest
+# table which meets the requested tolerance is recommended.
+
+# from "https://numpy.org/"
+from numpy import pi
+from numpy import sin
+from numpy import cos
+from numpy import sqrt
+from numpy import abs
+from numpy import arange
+from numpy import linspace
+from numpy import logspace
+from numpy import concatenate
+from numpy import zeros_like
+from numpy import isfinite
+from numpy.random import default_rng
+
+# from the standard library
+from time import perf_counter
+
+# from local modules
+from quadlib import computeJ1J2
+from pygnetti import coil, cubicgrid
+
+################################################## REFERENCES
+
+# reference kernel: the normalised integrals are computed by
+# the adaptive quadrature at every point (slow but accurate)
+class exactcoil(coil):
+
+    def interpolate(self, A):
+        J1, J2, E1, E2, N = computeJ1J2(A)
+        return J1, J2
+
+# brute force Biot-Savart integration of one loop of radius r
+# centred on the origin in the plane xOy (vectorised version of
+# "LoopXY" in "obsolete/development.py"). The field is computed
+# at the points (X, 0, Z) with n segments. The units are the same
+# as in "pygnetti.py": mm and mT for a current of 1A.
+def loopXZ(r, X, Z, n = 1000, chunk = 1000):
+    X, Z = X.reshape(-1), Z.reshape(-1)
+    BX, BZ = zeros_like(X), zeros_like(Z)
+    t = arange(n)*2.0*pi/n
+    # segment positions and lengths
+    mx, my = r*cos(t), r*sin(t)
+    dx, dy = -my*2.0*pi/n, mx*2.0*pi/n
+    for i in range(0, len(X), chunk):
+        x, z = X[i:i+chunk, None], Z[i:i+chunk, None]
+        # vector from the segments to the points
+        rx, ry, rz = x-mx, -my, z+0.0*mx
+        r3 = sqrt(rx*rx+ry*ry+rz*rz)**3
+        # dl x r (the y component vanishes by symmetry)
+        BX[i:i+chunk] = (dy*rz/r3).sum(axis = 1)
+        BZ[i:i+chunk] = ((dx*ry-dy*rx)/r3).sum(axis = 1)
+    # mu_0/4/pi = 1E-7, lengths in mm, field in mT
+    return BX/10.0, BZ/10.0
+
+################################################## SAMPLING
+
+# values of alpha: uniform on [-1.0, +1.0] with a logarithmic
+# cluster near each end point (where the tables are the least
+# accurate).
+def sample_alpha(n = 100000, seed = 0):
+    rng = default_rng(seed)
+    E = logspace(-12, -1, n//10)
+    return concatenate((rng.uniform(-1.0, +1.0, n), -1.0+E, +1.0-E))
+
+# points (X, Z) around a loop of radius r: uniform in the box
+# [0, 3r]x[-1.5r, +1.5r], with a cluster at distances from the
+# wire between 1E-3r and 1E-1r (where alpha approaches 1.0).
+def sample_points(r = 1.0, n = 2000, seed = 0):
+    rng = default_rng(seed)
+    X = rng.uniform(0.0, 3.0*r, n)
+    Z = rng.uniform(-1.5*r, +1.5*r, n)
+    d = r*logspace(-3, -1, n//4)
+    a = rng.uniform(0.0, 2.0*pi, n//4)
+    return concatenate((X, r+d*cos(a))), concatenate((Z, d*sin(a)))
+
+################################################## MEASURES
+
+# best time per evaluation [s] of f(*args) over n elements
+def timing(f, n, *args, repeat = 3):
+    T = []
+    for i in range(repeat):
+        t = perf_counter()
+        f(*args)
+        T.append(perf_counter()-t)
+    return min(T)/n
+
+# maximum and root mean square of the finite values of E
+def maxrms(E):
+    E = abs(E[isfinite(E)])
+    return E.max(), sqrt((E*E).mean())
+
+# table error against the reference integrals at the values
+# of alpha found in A. Returns max, rms, and time per value.
+def check_table(c, A, R1, R2):
+    J1, J2 = c.interpolate(A)
+    m1, r1 = maxrms(J1-R1)
+    m2, r2 = maxrms(J2-R2)
+    return max(m1, m2), max(r1, r2), timing(c.interpolate, len(A), A)
+
+# relative loop field error against the reference fields at
+# the points (X, Z). Returns max, rms, and time per point.
+def check_field(c, r, X, Z, RX, RZ):
+    BX, BZ = c.loop_field(r, 0.0, X, Z)
+    E = sqrt((BX-RX)**2+(BZ-RZ)**2)/sqrt(RX**2+RZ**2)
+    m, s = maxrms(E)
+    return m, s, timing(c.loop_field, len(X), r, 0.0, X, Z)
+
+################################################## CANDIDATES
+
+# candidate kernels: cubic and uniform tables with 2^k intervals
+# (the reference integrals are computed at the nodes)
+def candidates(kmin = 6, kmax = 16):
+    K = []
+    for k in range(kmin, kmax+1):
+        n = 2**k+1
+        for name, A in [
+                ("cubic", cubicgrid(n)),
+                ("uniform", linspace(-1.0, 1.0, n))]:
+            J1, J2, E1, E2, N = computeJ1J2(A)
+            K.append((f"{name} {n}", n, coil((A, J1, J2))))
+    return K
+
+# run all the comparisons and recommend the smallest table that
+# meets the relative field tolerance "tol". Returns the report
+# lines (name, size, table error, field error, timing), and the
+# recommended kernel name (None if no candidate qualifies).
+def validate(tol = 1E-6, table = './J1J2.txt', r = 1.0, seed = 0,
+        kmin = 6, kmax = 16, brute = True):
+    # references
+    A = sample_alpha(seed = seed)
+    R1, R2, E1, E2, N = computeJ1J2(A)
+    X, Z = sample_points(r, seed = seed)
+    ref = exactcoil(table)
+    RX, RZ = ref.loop_field(r, 0.0, X, Z)
+    rows = []
+    # reference kernel
+    rows.append(("exact", None,
+        check_table(ref, A, R1, R2), check_field(ref, r, X, Z, RX, RZ)))
+    # brute force integration
+    if brute:
+        t = perf_counter()
+        BX, BZ = loopXZ(r, X, Z)
+        t = (perf_counter()-t)/len(X)
+        E = sqrt((BX-RX)**2+(BZ-RZ)**2)/sqrt(RX**2+RZ**2)
+        rows.append(("brute 1000", None, None, (*maxrms(E), t)))
+    # installed table
+    c = coil(table)
+    rows.append((table, len(c.A),
+        check_table(c, A, R1, R2), check_field(c, r, X, Z, RX, RZ)))
+    # candidates
+    best = None
+    for name, n, c in candidates(kmin, kmax):
+        f = check_field(c, r, X, Z, RX, RZ)
+        rows.append((name, n, check_table(c, A, R1, R2), f))
+        if f[0] < tol:
+            if best is None or n < best[1] or (n == best[1] and f[2] < best[2]):
+                best = name, n, f[2]
+    return rows, (best[0] if best else None)
+
+# print the report (errors are absolute for J1, J2 and
+# relative for the field, times are per evaluation [s])
+def report(rows, best, tol):
+    print(f"{'kernel':>14} {'size':>7} "
+        f"{'J max':>8} {'J rms':>8} {'J time':>8} "
+        f"{'B max':>8} {'B rms':>8} {'B time':>8}")
+    for name, n, J, B in rows:
+        n = f"{n:7d}" if n else f"{'-':>7}"
+        J = " ".join(f"{v:8.1E}" for v in J) if J else " ".join(3*[f"{'-':>8}"])
+        B = " ".join(f"{v:8.1E}" for v in B)
+        print(f"{name:>14} {n} {J} {B}")
+    print(f"tolerance {tol:.1E}: "
+        + (f"use '{best}'" if best else "no table qualifies, use 'exact'"))
+    return
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description = "validate the J1J2 tables")
+    parser.add_argument("--tol", type = float, default = 1E-6,
+        help = "relative field tolerance")
+    parser.add_argument("--table", default = "./J1J2.txt",
+        help = "table file to validate")
+    parser.add_argument("--kmax", type = int, default = 16,
+        help = "largest candidate table (2^kmax intervals)")
+    args = parser.parse_args()
+
+    rows, best = validate(args.tol, args.table, kmax = args.kmax)
+    report(rows, best, args.tol)
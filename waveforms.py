@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+# file: waveforms.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: fields of time dependent currents
+# repository: https://github.com/RochSchanen/pygnetti
+
+# The field is linear in the current: the field of each coil is
+# computed once for a current of 1A ("unit fields") at the points
+# of a grid, and the field at any time is the sum of the unit
+# fields scaled by the currents at that time. The frames of many
+# time steps are computed together by one matrix product (time
+# steps x coils by coils x points), and are either generated one
+# by one or written into a memory mapped file (numpy format).
+
+# from "https://numpy.org/"
+from numpy import pi
+from numpy import sin
+from numpy import clip
+from numpy import where
+from numpy import empty
+from numpy import asarray
+from numpy import column_stack
+from numpy import float64
+from numpy.lib.format import open_memmap
+
+################################################## UNIT FIELDS
+
+# fields of the coils for a current of 1A at the points (X, Z)
+# (the grid of the first coil by default). Returns the arrays GX
+# and GZ (coils x points) and the shape of the grid.
+def unitfields(coils, X = None, Z = None):
+    if X is None: X, Z = coils[0].X, coils[0].Z
+    X, Z = asarray(X, dtype = float), asarray(Z, dtype = float)
+    GX, GZ = empty((len(coils), X.size)), empty((len(coils), X.size))
+    for k, c in enumerate(coils):
+        GX[k], GZ[k] = c.field(X.reshape(-1), Z.reshape(-1))
+    return GX, GZ, X.shape
+
+################################################## WAVEFORMS
+
+# linear ramp from I0 to I1 between the times t0 and t1 [A] (a step
+# from I0 to I1 at the time t0 when t1 = t0)
+def ramp(I0, I1, t0, t1):
+    if t1 < t0:
+        raise ValueError(f"the ramp ends before it starts ({t1} < {t0})")
+    if t1 == t0:
+        return lambda T: where(asarray(T) < t0, float(I0), float(I1))
+    return lambda T: I0+(I1-I0)*clip((T-t0)/(t1-t0), 0.0, 1.0)
+
+# sinusoidal current of amplitude I, frequency f [Hz], phase
+# [rad] and offset [A]
+def sine(I, f, phase = 0.0, offset = 0.0):
+    return lambda T: offset+I*sin(2.0*pi*f*T+phase)
+
+# currents (time steps x coils) of the "waveforms" at the times T:
+# one function of time per coil (see above), or an array of
+# currents (time steps x coils) which is returned unchanged
+def currents(waveforms, T):
+    if callable(waveforms[0]):
+        T = asarray(T, dtype = float)
+        return column_stack([w(T) for w in waveforms])
+    return asarray(waveforms, dtype = float)
+
+################################################## FRAMES
+
+# generate the frames (BX, BZ) of the currents I (time steps x
+# coils) from the unit fields (see "unitfields()"): the frames are
+# computed by chunks of "chunk" time steps
+def frames(U, I, chunk = 256):
+    GX, GZ, shape = U
+    I = asarray(I, dtype = float)
+    for i in range(0, len(I), chunk):
+        BX, BZ = I[i:i+chunk] @ GX, I[i:i+chunk] @ GZ
+        for bx, bz in zip(BX, BZ):
+            yield bx.reshape(shape), bz.reshape(shape)
+    return
+
+# write the frames of the currents I into the memory mapped file
+# "path" (numpy format): the array has the shape (time steps, 2,
+# grid shape), BX and BZ being the two components. Returns the
+# array (use "numpy.load(path, mmap_mode = 'r')" to read it back).
+def series(path, U, I, chunk = 256, dtype = float64):
+    GX, GZ, shape = U
+    I = asarray(I, dtype = float)
+    S = open_memmap(path, mode = "w+", dtype = dtype,
+        shape = (len(I), 2)+tuple(shape))
+    for i in range(0, len(I), chunk):
+        n = len(I[i:i+chunk])
+        S[i:i+n, 0] = (I[i:i+chunk] @ GX).reshape((n,)+tuple(shape))
+        S[i:i+n, 1] = (I[i:i+chunk] @ GZ).reshape((n,)+tuple(shape))
+    S.flush()
+    return S
+
+if __name__ == "__main__":
+
+    from time import perf_counter
+    from numpy import linspace, float32
+    from pygnetti import coil
+
+    # main coil and trim coil
+    main, trim = coil(), coil()
+    main.set_geometry(radius = 15, height = 10.0, turns = 10, layers = 6)
+    trim.set_geometry(radius = 25, height = 2.0, turns = 2, layers = 2)
+    main.set_grid(0.0, 14.0, 29, -20.0, 20.0, 81)
+
+    t = perf_counter()
+    U = unitfields([main, trim])
+    t = perf_counter()-t
+    print(f"unit fields: {t:.3f}s")
+
+    # 10^4 steps: ramp on the main coil, AC on the trim coil
+    T = linspace(0.0, 1.0, 10000)
+    I = currents([ramp(0.0, 10.0, 0.1, 0.9), sine(0.5, 50.0)], T)
+    t = perf_counter()
+    S = series("waveforms.npy", U, I, dtype = float32)
+    t = perf_counter()-t
+    print(f"{len(T)} frames: {t:.3f}s")
+    print(f"central field at the end: {S[-1, 1, 40, 0]:.3f}mT")
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+# file: windings.py
+# author: Roch Schanen
+# created: 2026 10 18
+# content: winding generators
+# repository: https://github.com/RochSchanen/pygnetti
+
+# A winding generator computes the positions of the loops of a coil
+# from the bore radius, the height, the number of turns (on the first
+# layer) and the number of layers, as in "coil.set_geometry()". The
+# positions are built directly as arrays (no loop over the turns):
+# the generators return the radii R [mm], the heights H [mm], the
+# layer indices L (int32) and the wire diameter [mm]. The numbers of
+# turns and layers are rounded to the nearest integers. The loops
+# are ordered layer by layer, from the bottom turn to the top turn.
+# The generators are found by name in WINDINGS (see "coil.set_winding()").
+
+# from "https://numpy.org/"
+from numpy import sqrt
+from numpy import arange
+from numpy import repeat
+from numpy import cumsum
+from numpy import full
+from numpy import int32
+from numpy.random import default_rng
+
+# loops of the layers of n[j] turns: layer and turn indices
+def _layers(n):
+    L = repeat(arange(len(n), dtype = int32), n)
+    I = arange(n.sum())-repeat(cumsum(n)-n, n)
+    return L, I
+
+# compact winding (triangular packing from a cross section view):
+# n turns on even layers and n-1 turns on odd layers, the odd layers
+# being shifted by half a wire and nested between the turns of the
+# layer below
+def orthocyclic(radius = 10.0, height = 1.0, turns = 1, layers = 1):
+    turns, layers = int(round(turns)), int(round(layers))
+    d = height/turns
+    f = sqrt(3.0)/2.0
+    L, I = _layers(turns-arange(layers)%2)
+    R = radius+d/2+L*d*f
+    H = -height/2+d/2+I*d+(L%2)*d/2
+    return R, H, L, d
+
+# square packing: n turns on every layer, the turns of a layer
+# sitting on the turns of the layer below
+def square(radius = 10.0, height = 1.0, turns = 1, layers = 1):
+    turns, layers = int(round(turns)), int(round(layers))
+    d = height/turns
+    L, I = _layers(full(layers, turns))
+    return radius+d/2+L*d, -height/2+d/2+I*d, L, d
+
+# square packing with an insulation "gap" [mm] between the layers
+def layered(radius = 10.0, height = 1.0, turns = 1, layers = 1, gap = 0.0):
+    turns, layers = int(round(turns)), int(round(layers))
+    d = height/turns
+    L, I = _layers(full(layers, turns))
+    return radius+d/2+L*(d+gap), -height/2+d/2+I*d, L, d
+
+# imperfect winding: the loops of the winding "packing" are moved
+# by random offsets (normal distribution) of standard deviation
+# "sigma" wire diameters, radially and axially ("seed" makes the
+# winding reproducible)
+def randomized(radius = 10.0, height = 1.0, turns = 1, layers = 1,
+        sigma = 0.1, seed = None, packing = orthocyclic):
+    R, H, L, d = packing(radius, height, turns, layers)
+    g = default_rng(seed)
+    return R+g.normal(0.0, sigma*d, R.shape), H+g.normal(0.0, sigma*d, H.shape), L, d
+
+WINDINGS = {
+    "orthocyclic":  orthocyclic,
+    "square":       square,
+    "layered":      layered,
+    "randomized":   randomized,
+}
+
+if __name__ == "__main__":
+
+    from time import perf_counter
+
+    for name, f in WINDINGS.items():
+        R, H, L, d = f(radius = 15.0, height = 10.0, turns = 10, layers = 4)
+        print(f"{name:>12}: {len(R)} loops, outer radius {R.max()+d/2:.3f}mm")
+
+    # one million turns
+    t = perf_counter()
+    R, H, L, d = orthocyclic(radius = 50.0, height = 200.0, turns = 2000, layers = 500)
+    t = perf_counter()-t
+    print(f"{len(R)} loops: {t*1E3:.1f}ms, "
+        f"{(R.nbytes+H.nbytes+L.nbytes)/2**20:.1f}MB")